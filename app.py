@@ -3,12 +3,9 @@ CANOBURO ANALİZ - Streamlit App (ULTIMATE UI V4.2)
 Force-reload on JSON change and manual refresh button.
 """
 
+import html
 import streamlit as st
-import json
-import math
-import os
-import pandas as pd
-from datetime import datetime
+from data_service import shared_service, in_play, DATA_DIR, WINDOWS, DEFAULT_WINDOW, SCOPES
 
 # --- Page Config ---
 st.set_page_config(page_title="CANOBURO ANALİZ", layout="wide")
@@ -81,6 +78,11 @@ st.markdown("""
     .info-title { font-size: 0.8rem; color: #999; text-transform: uppercase; margin-bottom: 5px; }
     .info-content { font-size: 0.95rem; color: #fff; font-weight: 500; }
 
+    /* Plain HTML tables (logs, H2H, live line score): no dataframe round-trip */
+    .data-table { width: 100%; border-collapse: collapse; font-size: 0.85rem; margin-bottom: 8px; }
+    .data-table th { color: #999; font-weight: 600; text-align: left; padding: 6px 8px; border-bottom: 1px solid #444; }
+    .data-table td { color: #fff; padding: 5px 8px; border-bottom: 1px solid #2a2a3e; }
+
     [data-testid="stSidebar"] { min-width: 350px; max-width: 350px; }
 </style>
 """, unsafe_allow_html=True)
@@ -103,59 +105,74 @@ def content_card(label, content, icon, target=st):
     </div>
     """, unsafe_allow_html=True)
 
-# --- Load Data with File-Watch ---
-def get_file_mtime(filepath):
-    try:
-        return os.path.getmtime(filepath)
-    except: return 0
+def table_card(table, target=st):
+    """{'columns', 'rows'} from the view model as a static HTML table."""
+    head = "".join(f"<th>{html.escape(str(c))}</th>" for c in table['columns'])
+    body = "".join("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>" for row in table['rows'])
+    target.markdown(f'<table class="data-table"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>',
+                    unsafe_allow_html=True)
 
-@st.cache_data
-def load_data(mtime):
-    if os.path.exists("nba_data.json"):
-        with open("nba_data.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    return None
+# --- Shared Data Service (one per process, reloads on manifest change; the pages share it) ---
+service = shared_service(DATA_DIR)
 
 # Sidebar Refresh Logic
 if st.sidebar.button("🔄 Verileri Yenile (Cache Temizle)"):
-    st.cache_data.clear()
+    service.refresh(force=True)
     st.rerun()
 
-data_file = "nba_data.json"
-mtime = get_file_mtime(data_file)
-data = load_data(mtime)
+service.refresh()
 
 st.sidebar.title("🏀 CANOBURO ANALİZ")
-if data:
-    st.sidebar.caption(f"🔄 Güncelleme: {data['last_updated'][:16]}")
-    unique_dates = sorted(list(set(g['api_date'] for g in data['games'])))
+if service.manifest:
+    st.sidebar.caption(f"🔄 Güncelleme: {service.last_updated[:16]}")
+    unique_dates = service.dates
     selected_date = st.sidebar.selectbox("📅 Tarih Seçin", unique_dates, index=len(unique_dates)-1 if unique_dates else 0)
-    date_games = [g for g in data['games'] if g['api_date'] == selected_date]
+    date_games = service.games_on(selected_date)
     if not date_games:
         st.sidebar.warning("Bu tarihte maç bulunamadı.")
         st.stop()
-    game_labels = [f"⚔️ {g['visitor']['name']} @ {g['home']['name']}" for g in date_games]
-    selected_game_label = st.sidebar.radio("🔥 Maç Seçimi", game_labels, key="match_select")
-    game = date_games[game_labels.index(selected_game_label)]
+    game_ids = [g['game_id'] for g in date_games]
+    labels = {g['game_id']: f"⚔️ {g['label']}" for g in date_games}
+    selected_game_id = st.sidebar.radio("🔥 Maç Seçimi", game_ids, format_func=labels.get, key="match_select")
+    window = st.sidebar.select_slider("📏 Maç Penceresi", WINDOWS, value=DEFAULT_WINDOW, key="window")
+    scope = st.sidebar.radio("🏟️ Saha Filtresi", list(SCOPES), format_func=SCOPES.get, horizontal=True, key="scope")
+    view = service.view(selected_game_id, window, scope)
 else:
     st.error("Veri dosyası bulunamadı. Lütfen prefetch scriptini çalıştırın.")
     st.stop()
 
 # --- Main Page ---
-home, visitor = game['home'], game['visitor']
-h2h_logs, h2h_stats = game.get('h2h_logs', []), game.get('h2h_stats', {})
+game, home, visitor = view['game'], view['home'], view['visitor']
+h2h_logs, h2h_stats = view['h2h_logs'], view['h2h_stats']
+window_label = f"Son {window} Maç" + ("" if scope == 'all' else f" · {SCOPES[scope]}")
 
 st.title(f"{visitor['name']} @ {home['name']}")
-st.caption(f"📅 {game['api_date']} | 🏟️ {home['name']} Home | Status: {game['game_time']}")
+
+LIVE_REFRESH_S = 30  # live.py polls on the same cadence
+
+def show_status():
+    # Re-runs alone on a timer while the game can still move; only changed live deltas are read
+    service.apply_live()
+    live = game.get('live')
+    st.caption(f"📅 {game['api_date']} | 🏟️ {home['name']} Home | Status: {game['game_time']}"
+               + (f" | 📡 {live['updated_at'][11:19]}" if live and live.get('updated_at') else ""))
+    if live:
+        quarters = min(live['period'] or 4, 4)  # overtime points only show in the total
+        table_card({'columns': ['Takım', *(f"{i}. Çeyrek" for i in range(1, quarters + 1)), 'Toplam'],
+                    'rows': [[team['name'], *live[side]['q'][:quarters], live[side]['pts']]
+                             for side, team in (('visitor', visitor), ('home', home))]})
+
+st.fragment(show_status, run_every=LIVE_REFRESH_S if in_play(game) else None)()
 
 # =============================================================================
 # TEMEL İSTATİSTİKLER (8 Specific Cards)
 # =============================================================================
-st.markdown('<div class="section-title">📊 Temel İstatistikler (Son 10 Maç)</div>', unsafe_allow_html=True)
+st.markdown(f'<div class="section-title">📊 Temel İstatistikler ({window_label})</div>', unsafe_allow_html=True)
 v_col, h_col = st.columns(2)
 
-def display_basic_stats(col, team, color_emoji):
-    s = team['stats']
+def display_basic_stats(col, team, side, color_emoji):
+    s = view['stats'][side]
+    n = s.get('games_count', 0)
     with col:
         st.markdown(f'<div class="team-banner">{color_emoji} {team["name"]}</div>', unsafe_allow_html=True)
         # MS Row (4 Cards)
@@ -163,17 +180,17 @@ def display_basic_stats(col, team, color_emoji):
         metric_card("MS ORT", s.get('pts_avg', 0), c1)
         metric_card("MS MIN", s.get('pts_min', 0), c2)
         metric_card("MS MAX", s.get('pts_max', 0), c3)
-        metric_card("MS GAL", f"{s.get('wins', 0)}/10", c4)
+        metric_card("MS GAL", f"{s.get('wins', 0)}/{n}", c4)
         
         # 1Y Row (4 Cards)
         c1, c2, c3, c4 = st.columns(4)
         metric_card("1Y ORT", s.get('pts_1h_avg', 0), c1)
         metric_card("1Y MIN", s.get('pts_1h_min', 0), c2)
         metric_card("1Y MAX", s.get('pts_1h_max', 0), c3)
-        metric_card("IY GAL", f"{s.get('wins_1h', 0)}/10", c4)
+        metric_card("IY GAL", f"{s.get('wins_1h', 0)}/{n}", c4)
 
-display_basic_stats(v_col, visitor, "🔵")
-display_basic_stats(h_col, home, "🟢")
+display_basic_stats(v_col, visitor, 'visitor', "🔵")
+display_basic_stats(h_col, home, 'home', "🟢")
 
 # =============================================================================
 # QUARTER ANALYSIS (Differential Focused)
@@ -181,20 +198,15 @@ display_basic_stats(h_col, home, "🟢")
 st.markdown('<div class="section-title">📈 Çeyrek Analizi (Averaj & Verimlilik)</div>', unsafe_allow_html=True)
 v_q_col, h_q_col = st.columns(2)
 
-def display_quarters(col, team):
-    s = team['stats']
+def display_quarters(col, team, side):
+    qd = view['quarters'][side]
     with col:
         st.markdown(f"**{team['name']}**")
-        c1, c2, c3, c4 = st.columns(4)
+        cols = st.columns(4)
         
-        diffs = {}
-        for q in ['q1','q2','q3','q4']:
-            scored = s.get(q, 0)
-            allowed = s.get(f'opp_{q}', 0)
-            diff = round(scored - allowed, 1)
-            diffs[q] = diff
-            
-            with (c1 if q=='q1' else c2 if q=='q2' else c3 if q=='q3' else c4):
+        for c, (q, r) in zip(cols, qd['quarters'].items()):
+            scored, allowed, diff = r['scored'], r['allowed'], r['diff']
+            with c:
                 st.markdown(f"""
                 <div class="stat-card">
                     <div class="stat-label">{q.upper()}</div>
@@ -206,13 +218,12 @@ def display_quarters(col, team):
                 </div>
                 """, unsafe_allow_html=True)
         
-        if any(v != 0 for v in diffs.values()):
-            best_q = max(diffs, key=diffs.get).upper()
-            worst_q = min(diffs, key=diffs.get).upper()
-            st.markdown(f"🌟 En Verimli: **{best_q}** ({'+' if diffs[best_q.lower()] > 0 else ''}{diffs[best_q.lower()]}) | ⚠️ En Zayıf: **{worst_q}** ({diffs[worst_q.lower()]})")
+        if qd['best']:
+            best, worst = qd['quarters'][qd['best']]['diff'], qd['quarters'][qd['worst']]['diff']
+            st.markdown(f"🌟 En Verimli: **{qd['best'].upper()}** ({'+' if best > 0 else ''}{best}) | ⚠️ En Zayıf: **{qd['worst'].upper()}** ({worst})")
 
-display_quarters(v_q_col, visitor)
-display_quarters(h_q_col, home)
+display_quarters(v_q_col, visitor, 'visitor')
+display_quarters(h_q_col, home, 'home')
 
 # =============================================================================
 # LEADERS & INJURIES (Modern UI)
@@ -244,6 +255,11 @@ def display_modern_info(col, team):
         inj_html = "<br>".join([f"• {i['player']} ({i['status'][:15]})" for i in inj[:3]]) if inj else "Sakatlık Yok"
         content_card("Sakatlık Raporu", inj_html, "🏥", row2[1])
 
+        row3 = st.columns(3)
+        content_card("Top Çalma", format_top2('stl'), "🖐️", row3[0])
+        content_card("Blok", format_top2('blk'), "🧱", row3[1])
+        content_card("Üçlük", format_top2('fg3m'), "🎯", row3[2])
+
 display_modern_info(v_l_col, visitor)
 display_modern_info(h_l_col, home)
 
@@ -257,14 +273,7 @@ if h2h_logs:
     metric_card(f"{visitor['name'][:15]} H2H", h2h_stats.get('visitor_avg', 0), col2)
     metric_card(f"{home['name'][:15]} H2H", h2h_stats.get('home_avg', 0), col3)
     
-    h2h_df = pd.DataFrame([{
-        'Tarih': l['date'],
-        f'{visitor["name"]}': l['t2_pts'],
-        f'{home["name"]}': l['t1_pts'],
-        f'{visitor["name"]} 1Y': l['t2_1h'],
-        f'{home["name"]} 1Y': l['t1_1h']
-    } for l in h2h_logs])
-    st.dataframe(h2h_df, use_container_width=True, hide_index=True)
+    table_card(view['h2h_table'])
 else:
     st.info("Bu sezon aralarında maç oynanmamış.")
 
@@ -272,21 +281,9 @@ else:
 # COUPON SECTION
 # =============================================================================
 st.markdown('<div class="section-title">🎫 Algoritmik Kupon Önerileri</div>', unsafe_allow_html=True)
-h_avg, v_avg = home['stats'].get('pts_avg', 0), visitor['stats'].get('pts_avg', 0)
-h_h2h, v_h2h = h2h_stats.get('home_avg', 0), h2h_stats.get('visitor_avg', 0)
-h_cons = min(h_avg, h_h2h) if h_h2h > 0 else h_avg
-v_cons = min(v_avg, v_h2h) if v_h2h > 0 else v_avg
-h_base, v_base = math.floor(h_cons), math.floor(v_cons)
-h_marg, v_marg = h_base - home['stats'].get('pts_min', 0), v_base - visitor['stats'].get('pts_min', 0)
-
-if h_marg <= v_marg: t_pick, t_base, t_marg = home, h_base, h_marg
-else: t_pick, t_base, t_marg = visitor, v_base, v_marg
-
-if t_marg < 10: s_label = "Çok Stabil"
-elif t_marg <= 20: s_label = "Ortalama"
-else: s_label = "Çok Stabil Değil"
-
-total_base = math.floor(min(h_avg + v_avg, h_h2h + v_h2h if h_h2h > 0 else 999))
+coupon = view['coupon']
+t_pick, t_base, t_marg, s_label = coupon['pick_team'], coupon['t_base'], coupon['t_marg'], coupon['s_label']
+total_base = coupon['total_base']
 
 st.markdown(f"""
 <div class="coupon-card">
@@ -312,17 +309,15 @@ st.markdown(f"""
 # =============================================================================
 # GAME LOGS
 # =============================================================================
-st.markdown('<div class="section-title">📚 Son 10 Maç Geçmişi</div>', unsafe_allow_html=True)
+st.markdown(f'<div class="section-title">📚 {window_label} Geçmişi</div>', unsafe_allow_html=True)
 v_l, h_l = st.columns(2)
-def show_log(col, team):
+def show_log(col, team, side):
     with col:
         st.write(f"**{team['name']}**")
-        if team['last10_logs']:
-            df = pd.DataFrame(team['last10_logs'])[['date', 'matchup', 'wl', 'pts', 'opp_pts', 'pts_1h', 'opp_pts_1h']].copy()
-            df.columns = ['Tarih', 'Maç', 'G/M', 'Sayı', 'Rakip', '1Y', '1Y Rakip']
-            st.dataframe(df, use_container_width=True, hide_index=True)
-show_log(v_l, visitor)
-show_log(h_l, home)
+        if view['log_tables'][side] is not None:
+            table_card(view['log_tables'][side])
+show_log(v_l, visitor, 'visitor')
+show_log(h_l, home, 'home')
 
 st.divider()
 st.caption("CANOBURO ANALİZ © 2026 | NBA Verileri: swar/nba_api")
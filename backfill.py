@@ -0,0 +1,66 @@
+"""
+CANOBURO ANALİZ - Historical Backfill
+asyncio crawler that pulls ScoreboardV2 line scores for an arbitrary date range into the
+quarter store: bounded in-flight requests, the shared global rate limit, and every day
+written to SQLite as soon as its board arrives (an interrupted crawl keeps what it got).
+
+    python prefetch_data.py backfill --from 2024-10-22 --to 2025-04-13
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from nba_api.stats.endpoints import scoreboardv2
+import fetch_engine
+from fetch_engine import safe_api_call_async
+from metrics import METRICS
+from quarter_store import QuarterStore, board_rows, STORE_FILE
+
+CONCURRENCY = 16  # in-flight requests; the rate limiter still sets the pace
+
+
+def date_range(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+async def crawl(days, store, today, fetched_at, concurrency=CONCURRENCY, progress_every=50):
+    """Fetch every day in `days` and save it to `store` in completion order. Returns (saved, failed)."""
+    sem = asyncio.Semaphore(concurrency)
+    # Endpoint calls block on a worker thread each; size the pool to the allowed concurrency
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+    async def fetch(d):
+        async with sem:
+            return d, await safe_api_call_async(scoreboardv2.ScoreboardV2, game_date=d.strftime('%Y-%m-%d'))
+
+    empty = store.empty_days(min(days), max(days)) if days else set()
+    saved, failed = [], []
+    for done in asyncio.as_completed([fetch(d) for d in days]):
+        d, board = await done
+        if not board:
+            failed.append(d)
+            continue
+        # Parsing and the SQLite write stay on the loop thread; both are cheap next to a request
+        with METRICS.timer('parse'):
+            rows, is_final = board_rows(board, d, today, d.isoformat() in empty)
+        store.save_day(d, rows, is_final, fetched_at)
+        saved.append(d)
+        if len(saved) % progress_every == 0:
+            print(f"[Backfill] {len(saved)}/{len(days)} days stored...")
+    return saved, failed
+
+
+def backfill(start, end, today, fetched_at, refetch=False, concurrency=CONCURRENCY, store_path=STORE_FILE):
+    """Crawl [start, end] (final days already in the store are skipped unless refetch)."""
+    days = date_range(start, min(end, today))
+    t = time.perf_counter()
+    with QuarterStore(store_path) as store:
+        final = set() if refetch else store.final_days(start, end)
+        pending = [d for d in days if d.isoformat() not in final]
+        print(f"[Backfill] {start} -> {end}: {len(days) - len(pending)} final days cached, "
+              f"fetching {len(pending)} (concurrency {concurrency}, {fetch_engine.LIMITER.max_rate}/s)...")
+        saved, failed = asyncio.run(crawl(pending, store, today, fetched_at, concurrency))
+    print(f"[Backfill] Stored {len(saved)} days in {time.perf_counter() - t:.1f}s"
+          + (f"; {len(failed)} failed: {', '.join(sorted(map(str, failed)))}" if failed else ""))
+    return saved, failed
@@ -0,0 +1,138 @@
+"""
+CANOBURO ANALİZ - Coupon Backtester
+Replays the app's coupon rules (data_service.compute_coupon) on every game of the stored seasons,
+using only what was known before tip-off: each team's previous 10 games and the season's earlier
+meetings of the pair. All windows are grouped pandas/NumPy passes over the columnar game store.
+
+    python backtest.py --season 2024-25 --season 2025-26 --fetch
+"""
+
+import argparse
+import json
+import numpy as np
+import pandas as pd
+import game_store
+from data_service import STABILITY, compute_coupon, coupon_frame
+
+WINDOW = 10      # the card's last-N window
+MIN_GAMES = 10   # skip games until both teams have a full window, like mid-season cards
+LINES = ['team_over', 'total_1.5', 'total_2.5']
+
+
+# --- Pre-game Features ---
+def pregame_features(raw, window=WINDOW):
+    """Team rows with the card inputs as of tip-off: last-window pts avg/min and H2H avg of own points."""
+    df = raw.copy()
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    df['OPP_TEAM_ID'] = df.groupby('GAME_ID')['TEAM_ID'].transform('sum') - df['TEAM_ID']
+    df['is_home'] = df['MATCHUP'].str.contains('vs.', regex=False)
+    df['pts'] = df['PTS'].astype(np.int64)
+    df = df.sort_values(['SEASON', 'TEAM_ID', 'GAME_DATE', 'GAME_ID'], kind='stable').reset_index(drop=True)
+
+    # Previous games only: shift by one inside each team-season, then the trailing window
+    team = df.groupby(['SEASON', 'TEAM_ID'], sort=False)['pts']
+    prev = team.shift(1)
+    by = [df['SEASON'], df['TEAM_ID']]
+    rolling = prev.groupby(by, sort=False).rolling(window, min_periods=1)
+    df['games_before'] = team.cumcount()
+    df['pts_avg'] = rolling.mean().reset_index(level=[0, 1], drop=True).round(1).fillna(0)
+    df['pts_min'] = rolling.min().reset_index(level=[0, 1], drop=True).fillna(0).astype(np.int64)
+
+    # H2H is the season's earlier meetings (prefetch slices the current season's log)
+    pair = df.groupby(['SEASON', 'TEAM_ID', 'OPP_TEAM_ID'], sort=False)['pts']
+    meetings = pair.cumcount()
+    before = pair.cumsum() - df['pts']
+    df['h2h_avg'] = np.where(meetings > 0, (before / meetings.clip(lower=1)).round(1), 0.0)
+    return df
+
+
+def game_frame(features, min_games=MIN_GAMES):
+    """One row per game: home and visitor card inputs side by side plus the final score."""
+    cols = ['GAME_ID', 'SEASON', 'GAME_DATE', 'TEAM_ID', 'pts', 'pts_avg', 'pts_min', 'h2h_avg', 'games_before']
+    home = features.loc[features['is_home'], cols]
+    visitor = features.loc[~features['is_home'], cols].drop(columns=['SEASON', 'GAME_DATE'])
+    games = home.merge(visitor, on='GAME_ID', suffixes=('_h', '_v'))
+    games = games[(games['games_before_h'] >= min_games) & (games['games_before_v'] >= min_games)]
+    return games.sort_values(['GAME_DATE', 'GAME_ID']).reset_index(drop=True)
+
+
+# --- Coupon Outcomes ---
+def coupon_columns(games):
+    out = coupon_frame(games)
+    # Lines exactly as the app prints them: t_base - 0.5, total_base - 1.5 / - 2.5 ÜST
+    picked_pts = np.where(out['pick'] == 'home', games['pts_h'], games['pts_v'])
+    total = games['pts_h'].to_numpy() + games['pts_v'].to_numpy()
+    out['team_over'] = picked_pts > out['t_base'] - 0.5
+    out['total_1.5'] = total > out['total_base'] - 1.5
+    out['total_2.5'] = total > out['total_base'] - 2.5
+    return out
+
+
+def verify(coupons):
+    """Row-by-row check against data_service.compute_coupon; returns mismatching GAME_IDs."""
+    bad = []
+    for r in coupons.to_dict('records'):
+        c = compute_coupon({'pts_avg': r['pts_avg_h'], 'pts_min': r['pts_min_h']},
+                           {'pts_avg': r['pts_avg_v'], 'pts_min': r['pts_min_v']},
+                           {'home_avg': r['h2h_avg_h'], 'visitor_avg': r['h2h_avg_v']} if r['h2h_avg_h'] > 0 else {})
+        if (c['pick'], c['t_base'], c['t_marg'], c['s_label'], c['total_base']) != \
+                (r['pick'], r['t_base'], r['t_marg'], r['s_label'], r['total_base']):
+            bad.append(r['GAME_ID'])
+    return bad
+
+
+# --- Report ---
+def hit_rates(df):
+    return {line: {'games': len(df), 'hits': int(df[line].sum()),
+                   'hit_rate': round(float(df[line].mean()), 4) if len(df) else None} for line in LINES}
+
+
+def report(coupons):
+    return {
+        'games': len(coupons),
+        'lines': hit_rates(coupons),
+        'by_stability': {label: hit_rates(coupons[coupons['s_label'] == label]) for label in STABILITY},
+        'by_season': {season: hit_rates(g) for season, g in coupons.groupby('SEASON')},
+    }
+
+
+def backtest(raw, window=WINDOW, min_games=MIN_GAMES):
+    return coupon_columns(game_frame(pregame_features(raw, window), min_games))
+
+
+def print_report(rep):
+    print(f"[Backtest] {rep['games']} games")
+    print(f"  {'':<18}{'n':>6}" + ''.join(f"{line:>12}" for line in LINES))
+    rows = [('Tümü', rep['lines'])] + list(rep['by_stability'].items()) + list(rep['by_season'].items())
+    for name, rates in rows:
+        n = rates[LINES[0]]['games']
+        cells = ''.join(f"{rates[line]['hit_rate'] * 100:>11.1f}%" if n else f"{'-':>12}" for line in LINES)
+        print(f"  {name:<18}{n:>6}{cells}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the coupon rules on stored season game logs")
+    parser.add_argument('--season', action='append', help='season like 2024-25 (repeatable; default: all stored)')
+    parser.add_argument('--fetch', action='store_true', help='pull seasons missing from the store (one call each)')
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--min-games', type=int, default=MIN_GAMES)
+    parser.add_argument('--verify', action='store_true', help='cross-check every row against compute_coupon')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+    names = args.season or game_store.seasons()
+    if args.fetch:
+        import prefetch_data
+        for season in set(names) - set(game_store.seasons()):
+            frame = prefetch_data.fetch_league_frame(season)
+            if frame: game_store.save_season(season, pd.DataFrame(frame['data'], columns=frame['columns']))
+    raw = game_store.load_seasons(names)
+    if raw is None: parser.error("no stored seasons (run prefetch_data.py, or pass --season with --fetch)")
+    coupons = backtest(raw, args.window, args.min_games)
+    if args.verify:
+        bad = verify(coupons)
+        print(f"[Backtest] compute_coupon parity: {len(coupons) - len(bad)}/{len(coupons)} rows match")
+    rep = report(coupons)
+    print_report(rep)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,547 @@
+"""
+CANOBURO ANALİZ - Benchmarks
+Offline timing and parity checks. Network benchmarks run prefetch against the local replay
+server, fed either by recorded fixtures (--fixtures) or by a synthetic season.
+
+    python bench.py                       # everything, synthetic data
+    python bench.py quarter_cache main --fixtures fixtures/run.jsonl.gz --latency 0.1
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+import pandas as pd
+from nba_api.stats.endpoints import scoreboardv2, leaguegamefinder, leaguedashplayerstats
+from nba_api.stats.static import teams
+import backfill
+import backtest
+import fetch_engine
+import live
+import prefetch_data
+import replay
+import stats_engine
+import data_service
+from data_service import DataService
+from quarter_store import QuarterArray
+from prefetch_data import compute_stats
+
+
+# --- Synthetic Season ---
+SEASON_START = date(2025, 10, 21)
+
+
+def synthetic_season(seed=7, n_teams=30, n_days=165, games_per_day=7):
+    """(raw LeagueGameFinder frame, {game_id: {team_id: quarters}} dict) for a made-up season.
+    Some line scores are missing or contain zero quarters to exercise the skip rules."""
+    rng = random.Random(seed)
+    team_ids = [1610612737 + i for i in range(n_teams)]
+    start = SEASON_START
+    rows, cache = [], {}
+    for d in range(n_days):
+        day = (start + timedelta(days=d)).isoformat()
+        playing = rng.sample(team_ids, games_per_day * 2)
+        for k in range(games_per_day):
+            gid = f"0022500{d:03d}{k}"
+            home, away = playing[2 * k], playing[2 * k + 1]
+            qs = {t: [rng.choice([0] + list(range(18, 40))) for _ in range(4)] for t in (home, away)}
+            pts = {t: sum(qs[t]) + rng.randint(0, 12) for t in (home, away)}
+            if pts[home] == pts[away]: pts[home] += 1
+            if rng.random() > 0.05:
+                cache[gid] = {t: {'q1': q[0], 'q2': q[1], 'q3': q[2], 'q4': q[3], 'pts_1h': q[0] + q[1]} for t, q in qs.items()}
+            for t, opp, where in ((home, away, 'vs.'), (away, home, '@')):
+                rows.append({
+                    'TEAM_ID': t, 'GAME_ID': gid, 'GAME_DATE': day, 'MATCHUP': f"T{t % 100} {where} T{opp % 100}",
+                    'WL': 'W' if pts[t] > pts[opp] else 'L', 'PTS': pts[t],
+                    'PLUS_MINUS': float(pts[t] - pts[opp]) if rng.random() > 0.02 else None,
+                })
+    return pd.DataFrame(rows), cache
+
+
+def reference_l10(season, cache, team_id):
+    """The original per-team get_team_l10 loop (iterrows + dict lookups)."""
+    df = season[season['TEAM_ID'] == team_id].copy()
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    df = df.sort_values("GAME_DATE", ascending=False).head(10)
+    logs = []
+    for _, row in df.iterrows():
+        gid = row['GAME_ID']
+        qs = cache.get(gid, {})
+        team_q = qs.get(team_id, {})
+        opp_q = {}
+        for k, v in qs.items():
+            if k != team_id:
+                opp_q = v
+                break
+        pts = int(row['PTS'])
+        pm = row['PLUS_MINUS'] if pd.notna(row['PLUS_MINUS']) else 0
+        logs.append({
+            'game_id': gid, 'date': row['GAME_DATE'].strftime('%Y-%m-%d'),
+            'matchup': row['MATCHUP'], 'is_home': 'vs.' in row['MATCHUP'], 'wl': row['WL'].strip(),
+            'pts': pts, 'opp_pts': int(pts - pm),
+            'pts_1h': team_q.get('pts_1h', 0), 'opp_pts_1h': opp_q.get('pts_1h', 0),
+            'q1': team_q.get('q1', 0), 'q2': team_q.get('q2', 0), 'q3': team_q.get('q3', 0), 'q4': team_q.get('q4', 0),
+            'opp_q1': opp_q.get('q1', 0), 'opp_q2': opp_q.get('q2', 0), 'opp_q3': opp_q.get('q3', 0), 'opp_q4': opp_q.get('q4', 0)
+        })
+    return logs
+
+
+def timed(func, repeat=3):
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = func()
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+# --- Synthetic Stand-in ---
+SYNTHETIC_NOW = "2026-04-02T10:00:00+03:00"
+
+
+def result_set(name, headers, rows):
+    return {'name': name, 'headers': headers, 'rowSet': [[r.get(h) for h in headers] for r in rows]}
+
+
+def nba_json(*result_sets):
+    return 200, 'application/json', json.dumps({'resultSets': list(result_sets)})
+
+
+# (GAME_STATUS_ID, GAME_STATUS_TEXT, LIVE_PERIOD) through a game night: scheduled ... final
+LIVE_STEPS = [(1, '7:30 pm ET', 0), (2, 'End of 1st Qtr', 1), (2, 'Halftime', 2), (2, 'End of 3rd Qtr', 3),
+              (2, 'End of 4th Qtr', 4), (3, 'Final', 4)]
+
+
+class SyntheticResponder:
+    """Answers scoreboard, game-finder, player-stats and injury requests from synthetic_season().
+    Games from `today` on are scheduled but not played yet."""
+
+    def __init__(self, season, cache, today):
+        self.today = today.isoformat()
+        self.season = season[season['GAME_DATE'] < self.today]
+        self.cache = cache
+        self.schedule = season.drop_duplicates('GAME_ID').set_index('GAME_ID')
+        self.by_date = {d: g for d, g in season.groupby('GAME_DATE')}
+        self.team_ids = sorted(season['TEAM_ID'].unique().tolist())
+
+    def __call__(self, endpoint, query):
+        q = dict(query)
+        if endpoint == 'scoreboardv2': return self.scoreboard(q['GameDate'])
+        if endpoint == 'leaguegamefinder': return self.game_finder(q.get('TeamID'), q.get('VsTeamID'))
+        if endpoint == 'leaguedashplayerstats': return self.player_stats()
+        if endpoint == 'injuries': return self.injuries()
+        return None
+
+    def scoreboard(self, day, step=None):
+        """The day's board; with `step` (index into LIVE_STEPS) every game is at that point of a game night."""
+        expected = scoreboardv2.ScoreboardV2.expected_data
+        day_rows = self.by_date.get(day)
+        header, lines = [], []
+        if day_rows is not None:
+            status, text, period = LIVE_STEPS[-1 if day < self.today else 0] if step is None else LIVE_STEPS[step]
+            for gid, g in day_rows.groupby('GAME_ID', sort=False):
+                home = int(g.loc[g['MATCHUP'].str.contains('vs.', regex=False), 'TEAM_ID'].iloc[0])
+                away = int(g.loc[~g['MATCHUP'].str.contains('vs.', regex=False), 'TEAM_ID'].iloc[0])
+                header.append({'GAME_ID': gid, 'GAME_DATE_EST': f"{day}T00:00:00", 'GAME_STATUS_ID': status,
+                               'GAME_STATUS_TEXT': text, 'LIVE_PERIOD': period,
+                               'HOME_TEAM_ID': home, 'VISITOR_TEAM_ID': away, 'SEASON': '2025'})
+                for tid in (home, away):
+                    qs = self.cache.get(gid, {}).get(tid, {})
+                    lines.append({'GAME_ID': gid, 'TEAM_ID': tid, **{f'PTS_QTR{i}': qs.get(f'q{i}') if i <= period else None
+                                                                      for i in range(1, 5)}})
+        return nba_json(*(result_set(name, headers, header if name == 'GameHeader' else lines if name == 'LineScore' else [])
+                          for name, headers in expected.items()))
+
+    def game_finder(self, team_id, vs_team_id):
+        df = self.season
+        if team_id: df = df[df['TEAM_ID'] == int(team_id)]
+        if vs_team_id:
+            opp = df['GAME_ID'].map(self.season.groupby('GAME_ID')['TEAM_ID'].sum()) - df['TEAM_ID']
+            df = df[opp == int(vs_team_id)]
+        headers = leaguegamefinder.LeagueGameFinder.expected_data['LeagueGameFinderResults']
+        rows = df.sort_values('GAME_DATE', ascending=False).to_dict('records')
+        return nba_json(result_set('LeagueGameFinderResults', headers, rows))
+
+    def player_stats(self):
+        players = []
+        for team_id in self.team_ids:
+            rng = random.Random(team_id)
+            players += [{'PLAYER_ID': team_id * 100 + i, 'PLAYER_NAME': f"Player {team_id % 100}-{i}", 'TEAM_ID': team_id,
+                         'PTS': round(rng.uniform(2, 32), 1), 'REB': round(rng.uniform(1, 13), 1),
+                         'AST': round(rng.uniform(0, 10), 1), 'STL': round(rng.uniform(0, 2.5), 1),
+                         'BLK': round(rng.uniform(0, 2.5), 1), 'FG3M': round(rng.uniform(0, 4.5), 1)} for i in range(13)]
+        headers = leaguedashplayerstats.LeagueDashPlayerStats.expected_data['LeagueDashPlayerStats']
+        return nba_json(result_set('LeagueDashPlayerStats', headers, players))
+
+    def injuries(self):
+        tables = []
+        for i, t in enumerate(teams.get_teams()[::3]):
+            slug = t['full_name'].lower().replace(' ', '-')
+            # CBS serves both relative and absolute team links
+            host = 'https://www.cbssports.com' if i % 2 else ''
+            tables.append(
+                f'<div class="TableBaseWrapper"><span class="TeamName"><a href="{host}/nba/teams/{t["abbreviation"]}/{slug}/">'
+                f'{t["city"]}</a></span><table><tr class="TableBase-bodyTr"><td><span class="CellPlayerName--long">'
+                f'Injured {t["nickname"]}</span></td><td>G</td><td>Out</td></tr></table></div>')
+        return 200, 'text/html', f"<html><body>{''.join(tables)}</body></html>"
+
+
+@contextlib.contextmanager
+def stand_in(args):
+    """Replay server + pinned clock + fresh working directory for one benchmark."""
+    if args.fixtures:
+        meta, fixtures = replay.load_fixtures(args.fixtures)
+        responder, now = replay.FixtureResponder(fixtures), meta['now']
+    else:
+        season, cache = synthetic_season()
+        now = SYNTHETIC_NOW
+        responder = SyntheticResponder(season, cache, date.fromisoformat(now[:10]))
+    old_cwd, old_now = os.getcwd(), os.environ.get('PREFETCH_NOW')
+    with replay.ReplayServer(responder, latency=args.latency, fail_rate=args.fail_rate) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        os.environ['PREFETCH_NOW'] = now
+        replay.point_prefetch_at(server.url)
+        fetch_engine.LIMITER = fetch_engine.RateLimiter(args.rate, fetch_engine.BURST)
+        prefetch_data.reset_caches()
+        os.chdir(workdir)
+        try:
+            yield server
+        finally:
+            os.chdir(old_cwd)
+            if old_now is None: os.environ.pop('PREFETCH_NOW', None)
+            else: os.environ['PREFETCH_NOW'] = old_now
+
+
+def measure(label, func, server=None):
+    """Wall-clock, request counts and peak memory for one call."""
+    if server: server.reset_stats()
+    tracemalloc.start()
+    t = time.perf_counter()
+    out = func()
+    wall = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report = {'bench': label, 'wall_s': round(wall, 3), 'py_peak_mb': round(peak / 2**20, 1),
+              'rss_max_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    if server: report.update(server.stats())
+    print(f"[{label}] " + json.dumps(report))
+    return out, report
+
+
+# --- Benchmarks ---
+def bench_stats(args):
+    season, cache = synthetic_season()
+    team_ids = sorted(season['TEAM_ID'].unique().tolist())
+
+    def reference():
+        logs = {t: reference_l10(season, cache, t) for t in team_ids}
+        return logs, {t: compute_stats(l) for t, l in logs.items()}
+
+    def vectorized():
+        df = stats_engine.prepare_log(season, QuarterArray.from_cache(cache))
+        last10 = stats_engine.last_n(df, 10)
+        logs = stats_engine.records_by_team(last10)
+        return logs, stats_engine.compute_all_stats(last10)
+
+    t_ref, (ref_logs, ref_stats) = timed(reference)
+    t_vec, (vec_logs, vec_stats) = timed(vectorized)
+    for t in team_ids:
+        assert vec_logs[t] == ref_logs[t], f"log mismatch for team {t}"
+        assert vec_stats[t] == ref_stats[t], f"stats mismatch for team {t}: {vec_stats[t]} != {ref_stats[t]}"
+        assert list(vec_stats[t]) == list(ref_stats[t]), f"key order mismatch for team {t}"
+    print(f"[stats] {len(season)} team games, {len(team_ids)} teams: parity OK")
+    print(f"[stats] reference {t_ref * 1000:.1f} ms | vectorized {t_vec * 1000:.1f} ms | x{t_ref / t_vec:.1f}")
+    return [{'bench': 'stats', 'reference_ms': round(t_ref * 1000, 1), 'vectorized_ms': round(t_vec * 1000, 1)}]
+
+
+def bench_windows(args):
+    """window_stats off the prefix index vs compute_stats on the sliced log, per team, scope and n."""
+    season, cache = synthetic_season()
+    df = stats_engine.prepare_log(season, QuarterArray.from_cache(cache))
+    logs = stats_engine.records_by_team(df)
+    ns = sorted({1, *data_service.WINDOWS, max(len(l) for l in logs.values()) + 1})
+    scoped = {'all': lambda g: True, 'home': lambda g: g['is_home'], 'away': lambda g: not g['is_home']}
+    t, cases = time.perf_counter(), 0
+    for tid, team_logs in logs.items():
+        index = stats_engine.window_index(team_logs)
+        for scope, keep in scoped.items():
+            picked = [g for g in team_logs if keep(g)]
+            for n in ns:
+                got, want = data_service.window_stats(index[scope], n), compute_stats(picked[:n])
+                assert got == want, f"window mismatch for team {tid}, {scope}, n={n}: {got} != {want}"
+                cases += 1
+    wall = time.perf_counter() - t
+    print(f"[windows] {cases} (team x scope x n) cases match compute_stats")
+    return [{'bench': 'windows', 'cases': cases, 'wall_s': round(wall, 4)}]
+
+
+def bench_quarters(args):
+    """Memory of the old nested-dict layout vs QuarterArray, and an opponent lookup for every log row."""
+    season, cache = synthetic_season()
+    rows = [(gid, tid, v['q1'], v['q2'], v['q3'], v['q4']) for gid, qs in cache.items() for tid, v in qs.items()]
+    def nested():
+        out = {}
+        for gid, tid, q1, q2, q3, q4 in rows:
+            out.setdefault(gid, {})[tid] = {'q1': q1, 'q2': q2, 'q3': q3, 'q4': q4, 'pts_1h': q1 + q2}
+        return out
+    _, d = measure('quarters:dict', nested)
+    arr, a = measure('quarters:array', lambda: QuarterArray.from_rows(rows))
+    gids, tids = season['GAME_ID'].to_numpy(), season['TEAM_ID'].to_numpy()
+    _, lookup = measure('quarters:lookup', lambda: arr.lookup(gids, tids))
+    a['nbytes'], lookup['rows'] = arr.arr.nbytes, len(gids)
+    return [d, a, lookup]
+
+
+def bench_quarter_cache(args):
+    """Cold store (every day fetched) then warm store (only non-final days)."""
+    with stand_in(args) as server:
+        _, cold = measure('quarter_cache:cold', prefetch_data.build_quarter_cache, server)
+        prefetch_data.QUARTERS['array'] = QuarterArray.from_rows([])
+        _, warm = measure('quarter_cache:warm', prefetch_data.build_quarter_cache, server)
+    return [cold, warm]
+
+
+def bench_backfill(args):
+    """Whole season (synthetic, or the recorded window) through the async crawler into a fresh store."""
+    with stand_in(args) as server:
+        now = prefetch_data.run_now()
+        start = SEASON_START if not args.fixtures else now.date() - timedelta(days=120)
+        _, report = measure('backfill', lambda: backfill.backfill(start, now.date(), now.date(), now.isoformat()), server)
+    return [report]
+
+
+def bench_backtest(args):
+    """Coupon backtest over the synthetic season; every row is checked against compute_coupon."""
+    season, _ = synthetic_season()
+    season['SEASON'] = '2025-26'
+    coupons, report = measure('backtest', lambda: backtest.backtest(season))
+    assert not backtest.verify(coupons), "vectorized coupon differs from compute_coupon"
+    report.update(games=len(coupons), lines=backtest.report(coupons)['lines'])
+    return [report]
+
+
+def bench_main(args):
+    """Cold run, then a same-day rerun (HTTP cache revalidations, incremental reuse)."""
+    with stand_in(args) as server:
+        _, report = measure('main', prefetch_data.main, server)
+        report['run_report'] = prefetch_data.METRICS.report()
+        prefetch_data.reset_caches()
+        _, rerun = measure('main:rerun', prefetch_data.main, server)
+        rerun['run_report'] = prefetch_data.METRICS.report()
+    return [report, rerun]
+
+
+def bench_app(args):
+    """DataService cold load + every game's view model, then warm lookups, on main()'s output."""
+    with stand_in(args):
+        prefetch_data.main()
+        service = DataService()
+
+        def load_all():
+            service.refresh(force=True)
+            return [service.view(g['game_id']) for d in service.dates for g in service.games_on(d)]
+
+        views, cold = measure('app:cold', load_all)
+        _, warm = measure('app:warm', lambda: [service.view(v['game']['game_id']) for v in views])
+        # Every window x scope of every game: prefix lookups, no recomputation from logs
+        _, windows = measure('app:windows', lambda: [service.view(v['game']['game_id'], n, scope) for v in views
+                                                     for n in data_service.WINDOWS for scope in data_service.SCOPES])
+        service.refresh(force=True)
+        _, slate = measure('app:slate', lambda: service.slate())
+        cold['games'] = len(views)
+    return [cold, warm, windows, slate]
+
+
+def bench_live(args):
+    """A game night replayed poll by poll: live.py writes per-game deltas and the app's DataService
+    patches them in (refresh) next to the cost of a full reload. Synthetic season only."""
+    if args.fixtures:
+        print("[live] needs the synthetic season (record a game night with replay.py record-live instead)")
+        return []
+    with stand_in(args) as server:
+        prefetch_data.main()
+        service = DataService()
+        service.refresh(force=True)
+        all_ids = [g['game_id'] for d in service.dates for g in service.games_on(d)]
+        for gid in all_ids: service.view(gid)
+        service.slate()
+        today = prefetch_data.run_now().date().isoformat()
+        tonight = [g['game_id'] for g in service.games_on(today)]
+        # nba_api's ScoreboardV2 query for today; every poll gets the next step of the night
+        key = ('scoreboardv2', (('DayOffset', '0'), ('GameDate', today), ('LeagueID', '00')))
+        night = [dict(zip(('status', 'content_type', 'body'), server.responder.scoreboard(today, i)))
+                 for i in range(len(LIVE_STEPS))]
+        server.responder = replay.SequenceResponder({key: night}, fallback=server.responder)
+        applies = []
+
+        def apply(_interval=None):
+            t = time.perf_counter()
+            service.refresh()
+            applies.append(time.perf_counter() - t)
+
+        polls, run = measure('live:poll', lambda: live.run(prefetch_data.run_now, data_service.DATA_DIR, 0, sleep=apply), server)
+        apply()
+        # Final line scores landed in the loaded games, their views and the cached slate, without a reload
+        slate = service.slate()
+        for gid in tonight:
+            game = service.view(gid)['game']
+            assert game['game_time'] == 'Final' and game['live']['status_id'] == 3, gid
+            assert [game['live']['home']['q'], game['live']['visitor']['q']] == \
+                [[server.responder.fallback.cache.get(gid, {}).get(game[side]['id'], {}).get(f'q{i}', 0) for i in range(1, 5)]
+                 for side in ('home', 'visitor')], gid
+            assert (slate.loc[slate['game_id'] == gid, 'status'] == 'Final').all(), gid
+        run.update(polls=polls, games=len(tonight), apply_ms=[round(a * 1000, 2) for a in applies])
+
+        def reload():
+            service.refresh(force=True)
+            for gid in all_ids: service.view(gid)
+            service.slate()
+        _, full = measure('live:full_reload', reload)
+    print(f"[live] {len(tonight)} games over {polls} polls: deltas applied in "
+          f"{max(applies) * 1000:.2f} ms max vs full reload {full['wall_s'] * 1000:.0f} ms")
+    return [run, full]
+
+
+def snapshot(paths):
+    """{relative path: bytes} of every file under the given files / directories."""
+    out = {}
+    for top in paths:
+        walk = [(os.path.dirname(top), [], [os.path.basename(top)])] if os.path.isfile(top) else os.walk(top)
+        for root, _, files in walk:
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f: out[os.path.normpath(path)] = f.read()
+    return out
+
+
+def bench_shard(args, counts=(3, 4)):
+    """Serial run vs every shard of n runs plus merge_partials(): the outputs must be byte-identical."""
+    outputs = [prefetch_data.DATA_DIR]
+    reports = []
+    with stand_in(args) as server:
+        _, serial = measure('shard:serial', lambda: prefetch_data.main(incremental=False), server)
+        expected = snapshot(outputs)
+        reports.append(serial)
+        for n in counts:
+            for path in outputs:
+                if os.path.isdir(path): shutil.rmtree(path)
+                else: os.remove(path)
+            shutil.rmtree(prefetch_data.PARTIAL_DIR, ignore_errors=True)
+
+            def sharded():
+                for i in range(n):
+                    prefetch_data.reset_caches()
+                    prefetch_data.main(incremental=False, shard=(i, n))
+                prefetch_data.merge_partials()
+            _, report = measure(f'shard:{n}', sharded, server)
+            got = snapshot(outputs)
+            diff = sorted(p for p in set(got) | set(expected) if got.get(p) != expected.get(p))
+            assert not diff, f"{n} shards + merge differ from the serial run: {diff[:5]}"
+            report['files'] = len(got)
+            reports.append(report)
+    print(f"[shard] merged output of {', '.join(map(str, counts))} shards is byte-identical to the serial run")
+    return reports
+
+
+# TeamName headers as the CBS injury page has served them -> expected abbreviation
+CBS_HEADERS = [
+    ('<span class="TeamName"><a href="https://www.cbssports.com/nba/teams/LAL/los-angeles-lakers/">L.A. Lakers</a></span>', 'LAL'),
+    ('<span class="TeamName"><a href="https://www.cbssports.com/nba/teams/LAC/los-angeles-clippers/">L.A. Clippers</a></span>', 'LAC'),
+    ('<span class="TeamName"><a href="/nba/teams/GS/golden-state-warriors/">Golden St.</a></span>', 'GSW'),
+    ('<span class="TeamName"><a href="https://www.cbssports.com/nba/teams/NO/new-orleans-pelicans/">New Orleans</a></span>', 'NOP'),
+    ('<span class="TeamName"><a href="/nba/teams/UTAH/utah-jazz/">Utah</a></span>', 'UTA'),
+    ('<span class="TeamName"><a href="https://www.cbssports.com/nba/teams/WSH/">Washington</a></span>', 'WAS'),
+    ('<span class="TeamName">L.A. Lakers</span>', 'LAL'),
+    ('<span class="TeamName">Atlanta</span>', 'ATL'),
+]
+
+
+def bench_injuries(args):
+    """Team matching on real CBS header markup (absolute / relative links, CBS abbreviations, bare text)."""
+    from bs4 import BeautifulSoup
+    ids = {t['abbreviation']: t['id'] for t in teams.get_teams()}
+    t = time.perf_counter()
+    got = [prefetch_data.injury_team_id(BeautifulSoup(h, 'html.parser').find('span', class_='TeamName'))
+           for h, _ in CBS_HEADERS]
+    wall = time.perf_counter() - t
+    bad = [h for (h, abbr), tid in zip(CBS_HEADERS, got) if tid != ids[abbr]]
+    assert not bad, f"unmatched CBS headers: {bad}"
+    print(f"[injuries] {len(CBS_HEADERS)} CBS headers matched")
+    return [{'bench': 'injuries', 'headers': len(CBS_HEADERS), 'wall_s': round(wall, 4)}]
+
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ['pandas', 'numpy', 'bs4', 'nba_api.stats.endpoints']
+IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+print(json.dumps({{'import_s': round(time.perf_counter() - t, 3), 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+RENDER_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+t = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+first = time.perf_counter() - t
+t = time.perf_counter()
+at.run()
+print(json.dumps({{'first_render_s': round(first, 3), 'rerun_s': round(time.perf_counter() - t, 3),
+                  'exceptions': len(at.exception), 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def fresh_python(code, cwd=None):
+    """Run code in a new interpreter (nothing imported or cached yet); returns the JSON it prints last."""
+    env = {**os.environ, 'PYTHONPATH': REPO}
+    out = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(args):
+    """Cold start: fresh-interpreter import of the entry modules (and which heavy ones they pull in),
+    then the game page's first render and a rerun on main()'s output."""
+    reports = []
+    for module in ('prefetch_data', 'data_service'):
+        r = {'bench': f'startup:import:{module}',
+             **fresh_python(IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES))}
+        print(f"[{r['bench']}] " + json.dumps(r))
+        reports.append(r)
+    with stand_in(args):
+        prefetch_data.main()
+        r = {'bench': 'startup:first_render',
+             **fresh_python(RENDER_PROBE.format(app=os.path.join(REPO, 'app.py'), heavy=HEAVY_MODULES), cwd=os.getcwd())}
+    assert not r['exceptions'], "app raised on first render"
+    print(f"[{r['bench']}] " + json.dumps(r))
+    return reports + [r]
+
+
+BENCHES = {'stats': bench_stats, 'windows': bench_windows, 'quarters': bench_quarters, 'quarter_cache': bench_quarter_cache, 'backfill': bench_backfill,
+           'backtest': bench_backtest, 'main': bench_main, 'app': bench_app, 'live': bench_live,
+           'startup': bench_startup, 'shard': bench_shard,
+           'injuries': bench_injuries}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline prefetch / app benchmarks")
+    parser.add_argument('benches', nargs='*', help=f"any of {', '.join(BENCHES)} (default: all)")
+    parser.add_argument('--fixtures', help='recorded fixture file (replay.py record); synthetic season if omitted')
+    parser.add_argument('--latency', type=float, default=0.02, help='stand-in latency per request (s)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of requests answered 429')
+    parser.add_argument('--rate', type=float, default=50.0, help='client rate limit (req/s) during the run')
+    parser.add_argument('--json', help='also write all reports to this file')
+    args = parser.parse_args()
+    unknown = set(args.benches) - set(BENCHES)
+    if unknown: parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    reports = [r for name in args.benches or list(BENCHES) for r in BENCHES[name](args)]
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
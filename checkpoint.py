@@ -0,0 +1,85 @@
+"""
+CANOBURO ANALİZ - Run Checkpoints
+Atomic file writes plus a per-run scratch directory, so an interrupted prefetch resumes
+from its last finished stage / team / game instead of starting over.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+CHECKPOINT_DIR = ".prefetch_checkpoint"
+
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write_text(path, text):
+    """Write to a temp file in the same directory, then rename over path.
+    Readers see the old file or the new one, never a partial write."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; give the file the mode a plain open() would (readable by the app's user)
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+
+class Checkpoint:
+    """JSON entries under CHECKPOINT_DIR/<key>/, e.g. 'league_log' or 'games/<game_id>'.
+    A run keys it by date, so a rerun the same day picks up what the failed one finished."""
+
+    def __init__(self, key, root=CHECKPOINT_DIR, enabled=True):
+        self.root = root
+        self.dir = os.path.join(root, key)
+        self.enabled = enabled
+        self.hits = 0
+
+    def path(self, name):
+        return os.path.join(self.dir, f"{name}.json")
+
+    def load(self, name):
+        if not self.enabled: return None
+        try:
+            with open(self.path(name), 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return value
+
+    def save(self, name, value):
+        if not self.enabled: return value
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write_text(path, json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+        return value
+
+    def stage(self, name, func):
+        """Checkpointed result of func(), computed only when no earlier attempt saved it."""
+        value = self.load(name)
+        if value is None:
+            value = func()
+            if value is not None: self.save(name, value)
+        return value
+
+    def clear(self):
+        """Drop this run's checkpoints and stale ones from earlier days. Keys share a date
+        prefix, so parallel shard runs of the same day keep theirs until they finish."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+        day = os.path.basename(self.dir)[:10]
+        try: names = os.listdir(self.root)
+        except OSError: return
+        for name in names:
+            if not name.startswith(day): shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        try: os.rmdir(self.root)
+        except OSError: pass
@@ -0,0 +1,305 @@
+"""
+CANOBURO ANALİZ - Data Service
+Process-wide, thread-safe index over the prefetch shards, shared by every Streamlit session.
+Reloads only when the manifest mtime changes; per-game view models are built once.
+Live deltas (data/live/<game_id>.json, written by live.py) patch loaded games in place.
+Game pages render from plain rows; NumPy / pandas load only for the vectorized slate and backtest.
+"""
+
+import json
+import math
+import os
+import threading
+
+DATA_DIR = "data"
+QUARTERS = ['q1', 'q2', 'q3', 'q4']
+WINDOWS = [5, 10, 15, 20]
+DEFAULT_WINDOW = 10
+SCOPES = {'all': "Tümü", 'home': "İç Saha", 'away': "Deplasman"}
+LIVE_SUBDIR = "live"
+# Log / H2H tables: record fields in column order. prefetch stores these rows ready to render.
+LOG_FIELDS = ['date', 'matchup', 'wl', 'pts', 'opp_pts', 'pts_1h', 'opp_pts_1h']
+LOG_COLUMNS = ['Tarih', 'Maç', 'G/M', 'Sayı', 'Rakip', '1Y', '1Y Rakip']
+H2H_FIELDS = ['date', 't2_pts', 't1_pts', 't2_1h', 't1_1h']  # visitor first, like the cards
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_file_mtime(filepath):
+    try:
+        return os.path.getmtime(filepath)
+    except OSError: return 0
+
+
+# --- Coupon & Quarter Rules ---
+STABILITY = ["Çok Stabil", "Ortalama", "Çok Stabil Değil"]
+
+
+def stability_label(margin):
+    if margin < 10: return STABILITY[0]
+    elif margin <= 20: return STABILITY[1]
+    return STABILITY[2]
+
+
+def compute_coupon(home_stats, visitor_stats, h2h_stats):
+    """TAKIM TOPLAM ÜST pick (lower stability margin wins) and MAÇ SONU total base."""
+    h_avg, v_avg = home_stats.get('pts_avg', 0), visitor_stats.get('pts_avg', 0)
+    h_h2h, v_h2h = h2h_stats.get('home_avg', 0), h2h_stats.get('visitor_avg', 0)
+    h_cons = min(h_avg, h_h2h) if h_h2h > 0 else h_avg
+    v_cons = min(v_avg, v_h2h) if v_h2h > 0 else v_avg
+    h_base, v_base = math.floor(h_cons), math.floor(v_cons)
+    h_marg, v_marg = h_base - home_stats.get('pts_min', 0), v_base - visitor_stats.get('pts_min', 0)
+
+    if h_marg <= v_marg: pick, t_base, t_marg = 'home', h_base, h_marg
+    else: pick, t_base, t_marg = 'visitor', v_base, v_marg
+
+    total_base = math.floor(min(h_avg + v_avg, h_h2h + v_h2h if h_h2h > 0 else 999))
+    return {'pick': pick, 't_base': t_base, 't_marg': t_marg, 's_label': stability_label(t_marg),
+            'total_base': total_base}
+
+
+def coupon_frame(df):
+    """compute_coupon over whole columns: pts_avg/pts_min/h2h_avg with _h / _v suffixes in,
+    pick, t_base, t_marg, s_label and total_base columns added (same floors and tie-breaks)."""
+    import numpy as np
+    h_avg, v_avg = df['pts_avg_h'].to_numpy(float), df['pts_avg_v'].to_numpy(float)
+    h_h2h, v_h2h = df['h2h_avg_h'].to_numpy(float), df['h2h_avg_v'].to_numpy(float)
+    h_base = np.floor(np.where(h_h2h > 0, np.minimum(h_avg, h_h2h), h_avg)).astype(np.int64)
+    v_base = np.floor(np.where(v_h2h > 0, np.minimum(v_avg, v_h2h), v_avg)).astype(np.int64)
+    h_marg = h_base - df['pts_min_h'].to_numpy(np.int64)
+    v_marg = v_base - df['pts_min_v'].to_numpy(np.int64)
+    pick_home = h_marg <= v_marg
+    t_marg = np.where(pick_home, h_marg, v_marg)
+    out = df.copy()
+    out['pick'] = np.where(pick_home, 'home', 'visitor')
+    out['t_base'] = np.where(pick_home, h_base, v_base)
+    out['t_marg'] = t_marg
+    out['s_label'] = np.select([t_marg < 10, t_marg <= 20], STABILITY[:2], STABILITY[2])
+    out['total_base'] = np.floor(np.minimum(h_avg + v_avg, np.where(h_h2h > 0, h_h2h + v_h2h, 999))).astype(np.int64)
+    return out
+
+
+def quarter_diffs(stats):
+    """Per-quarter scored/allowed/diff plus best and worst quarter (None when all diffs are 0)."""
+    rows = {}
+    for q in QUARTERS:
+        scored, allowed = stats.get(q, 0), stats.get(f'opp_{q}', 0)
+        rows[q] = {'scored': scored, 'allowed': allowed, 'diff': round(scored - allowed, 1)}
+    diffs = {q: r['diff'] for q, r in rows.items()}
+    best = worst = None
+    if any(v != 0 for v in diffs.values()):
+        best, worst = max(diffs, key=diffs.get), min(diffs, key=diffs.get)
+    return {'quarters': rows, 'best': best, 'worst': worst}
+
+
+# --- Last-N Windows ---
+def window_stats(index, n):
+    """compute_stats for the newest n games of a scope, read off stats_engine.window_index prefixes."""
+    k = min(n, index['n'])
+    if k == 0: return {}
+    s, c = index['sum'], index['count']
+    def avg(key, count): return round(s[key][k] / count, 1) if count else 0
+    stats = {
+        'games_count': k,
+        'pts_avg': avg('pts', k),
+        'pts_max': index['max']['pts'][k - 1], 'pts_min': index['min']['pts'][k - 1],
+        'pts_1h_avg': avg('pts_1h', c['pts_1h'][k]),
+        'pts_1h_max': index['max']['pts_1h'][k - 1], 'pts_1h_min': index['min']['pts_1h'][k - 1],
+        'wins': s['wins'][k], 'wins_1h': s['wins_1h'][k],
+    }
+    for q in [*QUARTERS, *(f'opp_{q}' for q in QUARTERS)]:
+        stats[q] = avg(q, c[q][k])
+    return stats
+
+
+def table_rows(records, fields):
+    return [[r[f] for f in fields] for r in records]
+
+
+def team_window(team, n=DEFAULT_WINDOW, scope='all'):
+    """(stats, log table rows) of a team block for a window; blocks without an index only have the last 10."""
+    index = team.get('windows', {}).get(scope)
+    if index is None:
+        return team['stats'], table_rows(team.get('last10_logs', []), LOG_FIELDS)
+    picked, rows = index['rows'][:n], team.get('log_rows')
+    if rows is None: return window_stats(index, n), table_rows([team['season_logs'][i] for i in picked], LOG_FIELDS)
+    return window_stats(index, n), [rows[i] for i in picked]
+
+
+# --- View Models ---
+def h2h_table(game):
+    home, visitor = game['home']['name'], game['visitor']['name']
+    rows = game.get('h2h_rows')
+    return {'columns': ['Tarih', visitor, home, f'{visitor} 1Y', f'{home} 1Y'],
+            'rows': rows if rows is not None else table_rows(game.get('h2h_logs', []), H2H_FIELDS)}
+
+
+def log_table(rows):
+    return {'columns': LOG_COLUMNS, 'rows': rows} if rows else None
+
+
+def build_view(game, window=DEFAULT_WINDOW, scope='all'):
+    home, visitor = game['home'], game['visitor']
+    h2h_stats = game.get('h2h_stats', {})
+    (h_stats, h_rows), (v_stats, v_rows) = team_window(home, window, scope), team_window(visitor, window, scope)
+    coupon = compute_coupon(h_stats, v_stats, h2h_stats)
+    return {
+        'game': game, 'home': home, 'visitor': visitor, 'window': window, 'scope': scope,
+        'stats': {'home': h_stats, 'visitor': v_stats},
+        'h2h_logs': game.get('h2h_logs', []), 'h2h_stats': h2h_stats,
+        'h2h_table': h2h_table(game),
+        'log_tables': {'home': log_table(h_rows), 'visitor': log_table(v_rows)},
+        'quarters': {'home': quarter_diffs(h_stats), 'visitor': quarter_diffs(v_stats)},
+        'coupon': {**coupon, 'pick_team': home if coupon['pick'] == 'home' else visitor},
+    }
+
+
+def slate_frame(games, window=DEFAULT_WINDOW, scope='all'):
+    """One row per game for the slate page: card inputs gathered once per team, coupon in one pass."""
+    import numpy as np
+    import pandas as pd
+    if not games: return pd.DataFrame()
+    stats = {}
+    for g in games:
+        for side in ('home', 'visitor'):
+            tid = g[side]['id']
+            if tid not in stats: stats[tid] = team_window(g[side], window, scope)[0]
+    rows = []
+    for g in games:
+        h, v, h2h = stats[g['home']['id']], stats[g['visitor']['id']], g.get('h2h_stats', {})
+        rows.append({
+            'game_id': g['game_id'], 'date': g['api_date'], 'status': g['game_time'],
+            'home': g['home']['name'], 'visitor': g['visitor']['name'], 'h2h_games': len(g.get('h2h_logs', [])),
+            'pts_avg_h': h.get('pts_avg', 0), 'pts_min_h': h.get('pts_min', 0), 'h2h_avg_h': h2h.get('home_avg', 0),
+            'pts_avg_v': v.get('pts_avg', 0), 'pts_min_v': v.get('pts_min', 0), 'h2h_avg_v': h2h.get('visitor_avg', 0),
+        })
+    df = coupon_frame(pd.DataFrame(rows))
+    df['pick_team'] = np.where(df['pick'] == 'home', df['home'], df['visitor'])
+    return df
+
+
+def patch_live(game, delta):
+    """Overlay a live delta on a loaded game: status text plus the running line score."""
+    game['game_time'] = delta['game_time']
+    game['live'] = {'status_id': delta['status_id'], 'period': delta.get('period', 0),
+                    'home': delta['home'], 'visitor': delta['visitor'], 'updated_at': delta.get('updated_at')}
+
+
+def in_play(game):
+    """Scheduled or under way: worth watching for live deltas ('Final', 'Final/OT' are done)."""
+    return not str(game.get('game_time', '')).startswith('Final')
+
+
+# --- Service ---
+class DataService:
+    """Shared read-only dataset: date -> games and game_id -> view model indexes."""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.manifest_path = os.path.join(data_dir, "manifest.json")
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.manifest = None
+        self.dates = []
+        self.date_games = {}   # date -> [{'game_id', 'label'}]
+        self.game_dates = {}   # game_id -> date
+        self.teams = {}        # team ref -> team block (shared by the games that reference it)
+        self.games = {}        # game_id -> game with its team blocks attached
+        self.views = {}        # (game_id, window, scope) -> view model
+        self.slates = {}       # (window, scope) -> slate_frame of every game in the manifest
+        self.live_path = os.path.join(data_dir, LIVE_SUBDIR)
+        self.live = {}         # game_id -> latest live delta
+        self.live_mtimes = {}  # game_id -> mtime of the delta applied
+
+    def refresh(self, force=False):
+        """Reload the manifest and drop cached views if it changed on disk; then pick up live deltas."""
+        mtime = get_file_mtime(self.manifest_path)
+        if not force and mtime == self.mtime:
+            self.apply_live()
+            return False
+        with self.lock:
+            if force or mtime != self.mtime:
+                manifest = read_json(self.manifest_path) if mtime else None
+                dates = manifest['dates'] if manifest else {}
+                self.manifest, self.mtime = manifest, mtime
+                self.dates = sorted(dates)
+                self.date_games = dates
+                self.game_dates = {g['game_id']: d for d, games in dates.items() for g in games}
+                self.teams, self.games, self.views, self.slates = {}, {}, {}, {}
+                self.live, self.live_mtimes = {}, {}
+        self.apply_live()
+        return True
+
+    def apply_live(self):
+        """Patch games from new or changed live deltas; returns the game ids that moved.
+        Views share the game dict, so they see the patch; cached slates get their status cells updated."""
+        try:
+            entries = [(e.name[:-5], e.stat().st_mtime) for e in os.scandir(self.live_path) if e.name.endswith('.json')]
+        except OSError: return []
+        fresh = [(gid, m) for gid, m in entries if gid in self.game_dates and self.live_mtimes.get(gid) != m]
+        if not fresh: return []
+        with self.lock:
+            moved = []
+            for gid, m in fresh:
+                try: delta = read_json(os.path.join(self.live_path, f"{gid}.json"))
+                except (OSError, ValueError): continue  # half-written by a non-atomic copy: next refresh
+                self.live[gid], self.live_mtimes[gid] = delta, m
+                if gid in self.games: patch_live(self.games[gid], delta)
+                moved.append(gid)
+            for slate in self.slates.values():
+                if slate.empty: continue
+                status = slate['game_id'].map({gid: self.live[gid]['game_time'] for gid in moved})
+                slate['status'] = status.fillna(slate['status'])
+            return moved
+
+    @property
+    def last_updated(self):
+        return self.manifest['last_updated'] if self.manifest else None
+
+    def games_on(self, date):
+        return self.date_games.get(date, [])
+
+    def load_game(self, game_id):
+        if game_id in self.games: return self.games[game_id]
+        game = read_json(os.path.join(self.data_dir, "games", f"{game_id}.json"))
+        for side in ('home', 'visitor'):
+            ref = game[side]['ref']
+            if ref not in self.teams:
+                self.teams[ref] = read_json(os.path.join(self.data_dir, "teams", f"{ref}.json"))
+            game[side] = self.teams[ref]
+        if game_id in self.live: patch_live(game, self.live[game_id])
+        self.games[game_id] = game
+        return game
+
+    def view(self, game_id, window=DEFAULT_WINDOW, scope='all'):
+        key = (game_id, window, scope)
+        view = self.views.get(key)
+        if view is not None: return view
+        with self.lock:
+            if key not in self.views:
+                self.views[key] = build_view(self.load_game(game_id), window, scope)
+            return self.views[key]
+
+    def slate(self, window=DEFAULT_WINDOW, scope='all'):
+        """All manifest games in one frame, memoized until the data changes."""
+        key = (window, scope)
+        if key in self.slates: return self.slates[key]
+        with self.lock:
+            if key not in self.slates:
+                games = [self.load_game(g['game_id']) for d in self.dates for g in self.date_games[d]]
+                self.slates[key] = slate_frame(games, window, scope)
+            return self.slates[key]
+
+
+_SHARED = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_service(data_dir=DATA_DIR):
+    """One DataService per data dir for the whole process (every page and session uses it)."""
+    with _SHARED_LOCK:
+        if data_dir not in _SHARED: _SHARED[data_dir] = DataService(data_dir)
+        return _SHARED[data_dir]
@@ -0,0 +1,239 @@
+"""
+CANOBURO ANALİZ - Fetch Engine
+Bounded worker pool sharing one adaptive token-bucket rate limiter for every outbound call,
+all sent through one pooled, caching HTTP session (nba_api and the injury page alike).
+Point NBA_STATS_BASE_URL / INJURY_URL at a local stub server to exercise it offline.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from nba_api.stats.library.http import NBAStatsHTTP
+from metrics import METRICS, endpoint_name
+from http_cache import ResponseCache, cacheable
+
+# --- Config ---
+MAX_WORKERS = int(os.environ.get("PREFETCH_WORKERS", 6))
+RATE_PER_SEC = float(os.environ.get("PREFETCH_RATE", 2.5))
+BURST = int(os.environ.get("PREFETCH_BURST", 4))
+RETRIES = 3
+TIMEOUT = 30
+THROTTLE_CODES = {429, 502, 503, 504}
+HTTP_CACHE_FILE = os.environ.get("PREFETCH_HTTP_CACHE", "http_cache.db")  # empty disables the cache
+try:
+    import brotli  # noqa: F401  (urllib3 decodes br only when it is installed)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+class RateLimiter:
+    """Token bucket with AIMD pacing: halves its rate on throttling, climbs back linearly on success."""
+
+    def __init__(self, rate, burst, min_rate=0.2):
+        self.max_rate = self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_take(self):
+        """Take a token and return 0, or return the seconds until one is due."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        waited = 0.0
+        while (wait := self.try_take()):
+            time.sleep(wait)
+            waited += wait
+        if waited: METRICS.record_sleep('rate_limit', waited)
+
+    async def acquire_async(self):
+        """acquire() for coroutines: same bucket, so threads and tasks share one global rate."""
+        waited = 0.0
+        while (wait := self.try_take()):
+            await asyncio.sleep(wait)
+            waited += wait
+        if waited: METRICS.record_sleep('rate_limit', waited)
+
+    def throttled(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+LIMITER = RateLimiter(RATE_PER_SEC, BURST)
+
+
+def url_endpoint(url):
+    return [p for p in url.split('?')[0].split('/') if p][-1].lower()
+
+
+def _raise_on_throttle(response, *args, **kwargs):
+    # nba_api never checks status codes; surface throttling so the limiter can react
+    if response.status_code in THROTTLE_CODES:
+        response.raise_for_status()
+
+
+def _count_bytes(response, *args, **kwargs):
+    METRICS.record_bytes(url_endpoint(response.url), len(response.content))
+
+
+# --- Shared HTTP Session ---
+class CachingSession(requests.Session):
+    """Pooled keep-alive session that answers GETs from the response cache when still fresh and
+    revalidates stale entries with If-None-Match / If-Modified-Since (a 304 costs no body)."""
+
+    def __init__(self, cache_path=HTTP_CACHE_FILE, pool_size=MAX_WORKERS):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 1))
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.cache_path = cache_path
+        self._cache = None
+        self._cache_lock = threading.Lock()
+        self.hooks["response"].extend([_count_bytes, _raise_on_throttle])
+
+    @property
+    def cache(self):
+        # Opened on first use, in the directory the run works in
+        if self._cache is None and self.cache_path:
+            with self._cache_lock:
+                if self._cache is None: self._cache = ResponseCache(self.cache_path)
+        return self._cache
+
+    def close(self):
+        super().close()
+        if self._cache is not None: self._cache.close()
+
+    def send(self, request, **kwargs):
+        # nba_api advertises br; only ask for encodings we can decode
+        request.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        cache = self.cache if request.method == 'GET' else None
+        entry = cache.get(request.url) if cache else None
+        endpoint = url_endpoint(request.url)
+        if entry and entry[2]:
+            METRICS.record_cache(endpoint, 'hit')
+            return cached_response(request, entry)
+        if entry:
+            headers, _, _ = entry
+            if 'ETag' in headers: request.headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers: request.headers['If-Modified-Since'] = headers['Last-Modified']
+        response = super().send(request, **kwargs)
+        if entry and response.status_code == 304:
+            METRICS.record_cache(endpoint, 'revalidated')
+            cache.touch(request.url, response.headers)
+            return cached_response(request, entry, response)
+        if cache is not None:
+            METRICS.record_cache(endpoint, 'miss')
+            if cacheable(response): cache.put(request.url, response.headers, response.content)
+        return response
+
+
+def cached_response(request, entry, revalidation=None):
+    """A 200 rebuilt from a cache entry; keeps the 304's elapsed time when there was one."""
+    headers, body, _ = entry
+    res = requests.Response()
+    res.status_code, res.reason = 200, 'OK'
+    res.headers = CaseInsensitiveDict(headers)
+    res._content = body
+    res.encoding = get_encoding_from_headers(res.headers)
+    res.url, res.request = request.url, request
+    if revalidation is not None: res.elapsed = revalidation.elapsed
+    return res
+
+
+SESSION = None
+
+
+def configure_nba_api():
+    """(Re)build the shared session and route nba_api through it; call again after changing the env."""
+    global SESSION
+    base_url = os.environ.get("NBA_STATS_BASE_URL")
+    if base_url:
+        NBAStatsHTTP.base_url = base_url.rstrip("/") + "/{endpoint}"
+    if SESSION is not None: SESSION.close()
+    SESSION = CachingSession(os.environ.get("PREFETCH_HTTP_CACHE", HTTP_CACHE_FILE))
+    NBAStatsHTTP.set_session(SESSION)
+
+
+configure_nba_api()
+
+
+def is_throttle(exc):
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        return True
+    response = getattr(exc, "response", None)
+    return response is not None and response.status_code in THROTTLE_CODES
+
+
+def _failed(endpoint, started, attempt, exc):
+    """Record a failed attempt, slow the limiter on throttling and return the jittered backoff."""
+    throttled = is_throttle(exc)
+    METRICS.record_call(endpoint, time.perf_counter() - started, False, attempt, throttled)
+    if throttled:
+        LIMITER.throttled()
+    backoff = (attempt + 1) * 2 * random.uniform(0.75, 1.25)
+    METRICS.record_sleep('backoff', backoff)
+    return backoff
+
+
+def safe_api_call(endpoint_func, **kwargs):
+    kwargs.setdefault("timeout", TIMEOUT)
+    endpoint = endpoint_name(endpoint_func)
+    for attempt in range(RETRIES):
+        LIMITER.acquire()
+        t = time.perf_counter()
+        try:
+            res = endpoint_func(**kwargs)
+            METRICS.record_call(endpoint, time.perf_counter() - t, True, attempt)
+            LIMITER.succeeded()
+            return res
+        except Exception as e:
+            time.sleep(_failed(endpoint, t, attempt, e))
+    return None
+
+
+async def safe_api_call_async(endpoint_func, **kwargs):
+    """safe_api_call for coroutines: the blocking endpoint runs on a worker thread via the shared session."""
+    kwargs.setdefault("timeout", TIMEOUT)
+    endpoint = endpoint_name(endpoint_func)
+    for attempt in range(RETRIES):
+        await LIMITER.acquire_async()
+        t = time.perf_counter()
+        try:
+            res = await asyncio.to_thread(endpoint_func, **kwargs)
+            METRICS.record_call(endpoint, time.perf_counter() - t, True, attempt)
+            LIMITER.succeeded()
+            return res
+        except Exception as e:
+            await asyncio.sleep(_failed(endpoint, t, attempt, e))
+    return None
+
+
+def pmap(func, items, max_workers=MAX_WORKERS):
+    """Run func over items on the worker pool; results keep input order."""
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return [func(x) for x in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
@@ -0,0 +1,48 @@
+"""
+CANOBURO ANALİZ - Season Game Log Store
+Columnar on-disk copy of each season's LeagueGameFinder team rows (one compressed .npz of
+typed column arrays per season), so history-wide work never goes back to the API.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+GAME_LOG_DIR = "game_logs"
+COLUMNS = {'GAME_ID': 'U', 'TEAM_ID': 'int64', 'GAME_DATE': 'U', 'MATCHUP': 'U',
+           'WL': 'U', 'PTS': 'int64', 'PLUS_MINUS': 'float64'}
+
+
+def season_path(season, root=GAME_LOG_DIR):
+    return os.path.join(root, f"{season}.npz")
+
+
+def seasons(root=GAME_LOG_DIR):
+    try:
+        return sorted(n[:-4] for n in os.listdir(root) if n.endswith('.npz'))
+    except OSError: return []
+
+
+def save_season(season, raw, root=GAME_LOG_DIR):
+    """Keep the columns prepare_log needs from a raw LeagueGameFinder frame; rows without points are dropped."""
+    raw = raw[raw['PTS'].notna()]
+    arrays = {c: raw[c].fillna('' if t.startswith('U') else 0).to_numpy().astype(t) for c, t in COLUMNS.items()}
+    os.makedirs(root, exist_ok=True)
+    tmp = f"{season_path(season, root)}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, season_path(season, root))
+
+
+def load_season(season, root=GAME_LOG_DIR):
+    """Raw-shaped frame for one season, or None when it was never stored."""
+    try:
+        with np.load(season_path(season, root)) as f:
+            df = pd.DataFrame({c: f[c] for c in COLUMNS})
+    except OSError: return None
+    df['SEASON'] = season
+    return df
+
+
+def load_seasons(names, root=GAME_LOG_DIR):
+    frames = [df for df in (load_season(s, root) for s in names) if df is not None]
+    return pd.concat(frames, ignore_index=True) if frames else None
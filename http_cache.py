@@ -0,0 +1,74 @@
+"""
+CANOBURO ANALİZ - HTTP Response Cache
+On-disk SQLite cache of GET responses with their validators (ETag / Last-Modified) and max-age,
+so repeat requests become a local hit or a 304 revalidation instead of a full download.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = "http_cache.db"
+MAX_AGE_DAYS = 7  # entries untouched for longer are pruned on open
+KEEP_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Date')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    fresh_until REAL NOT NULL
+);
+"""
+
+
+def max_age(headers):
+    """Seconds the response may be served without revalidation (0 for no-cache / no-store / absent)."""
+    cc = headers.get('Cache-Control', '').lower()
+    if 'no-store' in cc or 'no-cache' in cc: return 0
+    m = re.search(r'max-age=(\d+)', cc)
+    return int(m.group(1)) if m else 0
+
+
+def cacheable(response):
+    if response.status_code != 200: return False
+    if 'no-store' in response.headers.get('Cache-Control', '').lower(): return False
+    return bool(response.headers.get('ETag') or response.headers.get('Last-Modified') or max_age(response.headers))
+
+
+class ResponseCache:
+    """url -> (kept headers, decoded body). Shared by the worker threads of one session."""
+
+    def __init__(self, path=CACHE_FILE):
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        with self.conn:
+            self.conn.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - MAX_AGE_DAYS * 86400,))
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, url):
+        """(headers, body, fresh) or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT headers, body, fresh_until FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None: return None
+        return json.loads(row[0]), row[1], row[2] > time.time()
+
+    def put(self, url, headers, body):
+        kept = {k: headers[k] for k in KEEP_HEADERS if k in headers}
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                              (url, json.dumps(kept), body, now, now + max_age(headers)))
+
+    def touch(self, url, headers):
+        """A 304 confirms the body: restart its clock and take any refreshed validators."""
+        entry = self.get(url)
+        if entry is None: return
+        merged = {**entry[0], **{k: headers[k] for k in KEEP_HEADERS if k in headers and k != 'Content-Type'}}
+        self.put(url, merged, entry[1])
@@ -0,0 +1,109 @@
+"""
+CANOBURO ANALİZ - Live Score Poller
+Polls ScoreboardV2 on a short interval for the slate days that still have unfinished games and
+writes one small delta file per game that has tipped off (status text, period, quarter points)
+under data/live/. The app patches its loaded games from them without reloading the dataset.
+
+    python prefetch_data.py live --interval 30
+"""
+
+import json
+import os
+import time
+from datetime import timedelta
+from nba_api.stats.endpoints import scoreboardv2
+from checkpoint import atomic_write_text
+from fetch_engine import safe_api_call
+from metrics import METRICS
+
+INTERVAL = 30          # seconds between polls
+LIVE_SUBDIR = "live"   # under the data dir: live/<game_id>.json
+IN_PROGRESS, FINAL = 2, 3  # GAME_STATUS_ID
+
+
+def live_dir(data_dir):
+    return os.path.join(data_dir, LIVE_SUBDIR)
+
+
+def board_deltas(board):
+    """ScoreboardV2 result -> ({game_id: delta} for games under way or over, set of unfinished game ids)."""
+    header = board.game_header.get_data_frame()
+    if header.empty: return {}, set()
+    lines = board.line_score.get_data_frame()
+    q_cols = ['PTS_QTR1', 'PTS_QTR2', 'PTS_QTR3', 'PTS_QTR4']
+    q = lines.reindex(columns=q_cols).fillna(0).astype(int)
+    pts = lines.reindex(columns=['PTS'])['PTS'].fillna(q.sum(axis=1)).astype(int)
+    by_team = {(gid, int(tid)): {'id': int(tid), 'q': qs, 'pts': p}
+               for gid, tid, qs, p in zip(lines['GAME_ID'], lines['TEAM_ID'], q.values.tolist(), pts.tolist())}
+    deltas, unfinished = {}, set()
+    for row in header.to_dict('records'):
+        gid, status = row['GAME_ID'], int(row['GAME_STATUS_ID'])
+        if status != FINAL: unfinished.add(gid)
+        if status < IN_PROGRESS: continue
+        h_id, v_id = int(row['HOME_TEAM_ID']), int(row['VISITOR_TEAM_ID'])
+        deltas[gid] = {
+            'game_id': gid, 'status_id': status, 'game_time': str(row.get('GAME_STATUS_TEXT', '')).strip(),
+            'period': int(row.get('LIVE_PERIOD') or 0),
+            'home': by_team.get((gid, h_id), {'id': h_id, 'q': [0] * 4, 'pts': 0}),
+            'visitor': by_team.get((gid, v_id), {'id': v_id, 'q': [0] * 4, 'pts': 0}),
+        }
+    return deltas, unfinished
+
+
+def write_delta(directory, delta, updated_at):
+    """Rewrite live/<game_id>.json only when the score or status moved (the app keys on its mtime)."""
+    path = os.path.join(directory, f"{delta['game_id']}.json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        old.pop('updated_at', None)
+        if old == delta: return False
+    except (OSError, ValueError): pass
+    atomic_write_text(path, json.dumps({**delta, 'updated_at': updated_at}, ensure_ascii=False, separators=(',', ':')))
+    return True
+
+
+def prune(directory, game_ids):
+    """Drop deltas of games that left the slate (the daily run moved the window on)."""
+    for name in os.listdir(directory):
+        if name.endswith('.json') and name[:-5] not in game_ids:
+            os.remove(os.path.join(directory, name))
+
+
+def poll(days, game_ids, directory, now):
+    """One pass over `days`. Returns (days that still have unfinished slate games, deltas written)."""
+    pending, written = [], 0
+    for day in days:
+        board = safe_api_call(scoreboardv2.ScoreboardV2, game_date=day)
+        if not board:
+            pending.append(day)  # try again next round
+            continue
+        with METRICS.timer('parse'):
+            deltas, unfinished = board_deltas(board)
+        for gid, delta in deltas.items():
+            if gid in game_ids: written += write_delta(directory, delta, now().isoformat())
+        if unfinished & game_ids: pending.append(day)
+    return pending, written
+
+
+def run(now, data_dir, interval=INTERVAL, max_polls=None, sleep=time.sleep):
+    """Poll the manifest's games of yesterday and today (US dates trail Istanbul) until all are final.
+    `now` is a clock callable; max_polls bounds the loop (1 = a single pass). Returns the poll count."""
+    with open(os.path.join(data_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+        dates = json.load(f)['dates']
+    today = now().date()
+    days = [d for d in sorted(dates) if d in {(today - timedelta(days=1)).isoformat(), today.isoformat()}]
+    game_ids = {g['game_id'] for d in days for g in dates[d]}
+    directory = live_dir(data_dir)
+    os.makedirs(directory, exist_ok=True)
+    prune(directory, game_ids)
+    print(f"[Live] Watching {len(game_ids)} games on {', '.join(days) or 'no slate day'} every {interval}s")
+    polls = 0
+    while days and (max_polls is None or polls < max_polls):
+        if polls: sleep(interval)
+        days, written = poll(days, game_ids, directory, now)
+        polls += 1
+        print(f"[Live] {now().strftime('%H:%M:%S')} poll {polls}: {written} updated, "
+              f"{len(days)} day(s) still in play")
+    if not days: print("[Live] Every watched game is final.")
+    return polls
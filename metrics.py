@@ -0,0 +1,116 @@
+"""
+CANOBURO ANALİZ - Run Metrics
+Thread-safe counters for every outbound call and pipeline stage, dumped as a run report.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30]  # seconds, upper bounds
+
+
+def endpoint_name(func):
+    """nba_api endpoints carry their URL name; plain functions may set an `endpoint` attribute too."""
+    return getattr(func, 'endpoint', None) or getattr(func, '__name__', 'unknown')
+
+
+def latency_summary(values):
+    if not values: return {}
+    ordered = sorted(values)
+    def pct(p): return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+    hist = {f"<={b}s": 0 for b in LATENCY_BUCKETS}
+    hist['>30s'] = 0
+    for v in values:
+        key = next((f"<={b}s" for b in LATENCY_BUCKETS if v <= b), '>30s')
+        hist[key] += 1
+    return {'mean': round(sum(values) / len(values), 3), 'p50': pct(0.5), 'p90': pct(0.9),
+            'max': round(ordered[-1], 3), 'histogram': hist}
+
+
+class RunMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.perf_counter()
+            self.started_at = datetime.now(timezone.utc).isoformat()
+            self.latencies = defaultdict(list)
+            self.counts = defaultdict(lambda: defaultdict(int))  # endpoint -> calls/ok/failed/retries/throttled
+            self.bytes = defaultdict(int)
+            self.cache = defaultdict(lambda: defaultdict(int))  # endpoint -> hit/revalidated/miss
+            self.sleeps = defaultdict(float)   # rate_limit / backoff
+            self.timers = defaultdict(float)   # parse, ...
+            self.stages = {}
+            self.extra = {}
+
+    def record_call(self, endpoint, seconds, ok, attempt, throttled=False):
+        with self.lock:
+            c = self.counts[endpoint]
+            self.latencies[endpoint].append(seconds)
+            c['calls'] += 1
+            c['ok' if ok else 'failed'] += 1
+            if attempt: c['retries'] += 1
+            if throttled: c['throttled'] += 1
+
+    def record_bytes(self, endpoint, nbytes):
+        with self.lock:
+            self.bytes[endpoint] += nbytes
+
+    def record_cache(self, endpoint, outcome):
+        with self.lock:
+            self.cache[endpoint][outcome] += 1
+
+    def record_sleep(self, kind, seconds):
+        with self.lock:
+            self.sleeps[kind] += seconds
+
+    def note(self, **values):
+        with self.lock:
+            self.extra.update(values)
+
+    @contextmanager
+    def timer(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.timers[name] += time.perf_counter() - t
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.stages[name] = round(self.stages.get(name, 0) + time.perf_counter() - t, 3)
+
+    def report(self):
+        with self.lock:
+            endpoints = {}
+            for ep in sorted(set(self.counts) | set(self.bytes)):
+                endpoints[ep] = {**{k: 0 for k in ('calls', 'ok', 'failed', 'retries', 'throttled')},
+                                 **self.counts.get(ep, {}), 'bytes': self.bytes.get(ep, 0),
+                                 'cache': dict(self.cache.get(ep, {})),
+                                 'latency_s': latency_summary(self.latencies.get(ep, []))}
+            return {
+                'started_at': self.started_at,
+                'wall_s': round(time.perf_counter() - self.started, 3),
+                'stages_s': dict(self.stages),
+                'endpoints': endpoints,
+                'totals': {'calls': sum(e['calls'] for e in endpoints.values()),
+                           'failed': sum(e['failed'] for e in endpoints.values()),
+                           'bytes': sum(e['bytes'] for e in endpoints.values())},
+                'sleep_s': {k: round(v, 3) for k, v in self.sleeps.items()},
+                'timers_s': {k: round(v, 3) for k, v in self.timers.items()},
+                **self.extra,
+            }
+
+
+METRICS = RunMetrics()
@@ -0,0 +1,47 @@
+"""
+CANOBURO ANALİZ - Slate Overview
+Every game in the prefetch window in one sortable table: pick, lines, stability and H2H.
+Built from the shared DataService in a single pass and reused until the data changes.
+"""
+
+import streamlit as st
+from data_service import shared_service, DATA_DIR, WINDOWS, DEFAULT_WINDOW, SCOPES
+
+st.set_page_config(page_title="CANOBURO ANALİZ - Bülten", layout="wide")
+
+service = shared_service(DATA_DIR)
+service.refresh()
+if not service.manifest:
+    st.error("Veri dosyası bulunamadı. Lütfen prefetch scriptini çalıştırın.")
+    st.stop()
+
+ALL_DATES = "Tümü"
+st.sidebar.title("📋 Bülten")
+st.sidebar.caption(f"🔄 Güncelleme: {service.last_updated[:16]}")
+dates = [ALL_DATES, *service.dates]
+selected_date = st.sidebar.selectbox("📅 Tarih Seçin", dates, index=len(dates) - 1, key="slate_date")
+window = st.sidebar.select_slider("📏 Maç Penceresi", WINDOWS, value=DEFAULT_WINDOW, key="slate_window")
+scope = st.sidebar.radio("🏟️ Saha Filtresi", list(SCOPES), format_func=SCOPES.get, horizontal=True, key="slate_scope")
+
+slate = service.slate(window, scope)
+if selected_date != ALL_DATES and not slate.empty:
+    slate = slate[slate['date'] == selected_date]
+if slate.empty:
+    st.warning("Bu tarihte maç bulunamadı.")
+    st.stop()
+
+st.title("📋 Günün Bülteni")
+st.caption(f"{len(slate)} maç | Son {window} maç" + ("" if scope == 'all' else f" · {SCOPES[scope]}")
+           + " | Sütun başlığına tıklayarak sıralayın")
+
+table = slate.assign(**{
+    'Tarih': slate['date'], 'Durum': slate['status'], 'Maç': slate['visitor'] + " @ " + slate['home'],
+    'Seçim': slate['pick_team'], 'Takım Üst': slate['t_base'] - 0.5, 'Marj': slate['t_marg'],
+    'Stabilite': slate['s_label'], 'Barem': slate['total_base'],
+    'MS Üst': slate['total_base'] - 1.5, 'MS Banko': slate['total_base'] - 2.5,
+    'H2H': slate['h2h_games'], 'H2H Dep': slate['h2h_avg_v'], 'H2H Ev': slate['h2h_avg_h'],
+})[['Tarih', 'Durum', 'Maç', 'Seçim', 'Takım Üst', 'Marj', 'Stabilite', 'Barem', 'MS Üst', 'MS Banko',
+    'H2H', 'H2H Dep', 'H2H Ev']].sort_values(['Marj', 'Tarih'])
+
+st.dataframe(table, use_container_width=True, hide_index=True, height=min(38 * (len(table) + 1), 800))
+st.caption("Marj küçüldükçe seçim daha stabil. Maç detayı için ana sayfaya dönün.")
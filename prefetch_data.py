@@ -3,125 +3,156 @@ CANOBURO ANALİZ - Prefetch Script (ELITE VERSION)
 Expanded cache window and additional stat metrics for UI cards.
 """
 
+import argparse
+import functools
+import hashlib
 import json
 import math
+import os
+import threading
 import time
+import zlib
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 import pytz
-import requests
-from bs4 import BeautifulSoup
-from nba_api.stats.static import teams
-from nba_api.stats.endpoints import scoreboardv2, leaguegamefinder, teamplayerdashboard
-import pandas as pd
+import fetch_engine
+from fetch_engine import safe_api_call, pmap
+from metrics import METRICS
+from checkpoint import Checkpoint, atomic_write_text
+from data_service import table_rows, LOG_FIELDS, H2H_FIELDS
+# pandas / NumPy (stats_engine, game_store, quarter_store), the nba_api endpoints and bs4 are
+# imported by the stages that use them: merge, live and --help start without them
 
 # --- Config ---
 SEASON_YEAR = "2025-26"
 ISTANBUL_TZ = pytz.timezone('Europe/Istanbul')
-OUTPUT_FILE = "nba_data.json"
-QUARTER_CACHE = {} 
+REPORT_FILE = "run_report.json"
+DATA_DIR = "data"  # manifest.json + games/<game_id>.json + teams/<ref>.json
+INJURY_URL = os.environ.get("INJURY_URL", "https://www.cbssports.com/nba/injuries/")
+INJURY_TTL = 30 * 60  # seconds
+QUARTERS = {'array': None}  # line scores of the cache window (QuarterArray), set by build_quarter_cache
+LEAGUE_LOG = {}  # team_id -> that team's season games, newest first
+TEAM_LOGS = {}  # team_id -> season log dicts, newest first
+TEAM_WINDOWS = {}  # team_id -> stats_engine.window_index of its season log
+TEAM_STATS = {}  # team_id -> last-10 card stats
+LEADERS = {'index': None}  # {team_id: {stat: top-k players}}, fetched once per run on first use
+LEADERS_LOCK = threading.Lock()
 
-def safe_api_call(endpoint_func, **kwargs):
-    for attempt in range(3):
-        try:
-            res = endpoint_func(**kwargs)
-            time.sleep(0.4)
-            return res
-        except Exception as e:
-            time.sleep((attempt+1)*2)
-    return None
+def run_now():
+    """Current Istanbul time; PREFETCH_NOW (ISO timestamp) pins it for offline replays."""
+    pinned = os.environ.get("PREFETCH_NOW")
+    return datetime.fromisoformat(pinned).astimezone(ISTANBUL_TZ) if pinned else datetime.now(ISTANBUL_TZ)
 
+@functools.lru_cache(maxsize=None)
 def get_team_map():
+    from nba_api.stats.static import teams
     all_teams = teams.get_teams()
     return {t['id']: t['full_name'] for t in all_teams}
 
-TEAM_MAP = get_team_map()
+def team_name(team_id):
+    return get_team_map().get(team_id, "Unknown")
+
+@functools.lru_cache(maxsize=None)
+def get_team_keys():
+    """Lookup of abbreviation, CBS url slug, city and nickname -> team id."""
+    from nba_api.stats.static import teams
+    all_teams = teams.get_teams()
+    cities = [t['city'].lower() for t in all_teams]
+    keys = {}
+    for t in all_teams:
+        keys[t['abbreviation']] = t['id']
+        keys[t['full_name'].lower().replace(' ', '-')] = t['id']
+        keys[t['nickname'].lower()] = t['id']
+        if cities.count(t['city'].lower()) == 1:  # "Los Angeles" is two teams
+            keys[t['city'].lower()] = t['id']
+    return keys
 
 # --- Bulk Scoreboard Fetch ---
 def build_quarter_cache(days=120):
-    """Expanded to 120 days to cover almost all teams' last 10 games."""
-    print(f"[Prefetch] Building quarter cache for last {days} days...")
-    today = datetime.now(ISTANBUL_TZ).date()
-    for i in range(days + 1):
-        d = today - timedelta(days=i)
-        print(f"  Fetching {d}...", end="\r")
-        board = safe_api_call(scoreboardv2.ScoreboardV2, game_date=d.strftime('%Y-%m-%d'))
-        if not board: continue
-        lines = board.line_score.get_data_frame()
-        if lines.empty: continue
-        
-        for _, row in lines.iterrows():
-            game_id = row['GAME_ID']
-            team_id = int(row['TEAM_ID'])
-            if game_id not in QUARTER_CACHE: QUARTER_CACHE[game_id] = {}
-            
-            def safe_get(key):
-                val = row.get(key, 0)
-                return int(val) if pd.notna(val) else 0
-                
-            q1, q2, q3, q4 = safe_get('PTS_QTR1'), safe_get('PTS_QTR2'), safe_get('PTS_QTR3'), safe_get('PTS_QTR4')
-            QUARTER_CACHE[game_id][team_id] = {
-                'q1': q1, 'q2': q2, 'q3': q3, 'q4': q4,
-                'pts_1h': q1 + q2
-            }
-    print(f"\n[Prefetch] Quarter cache built: {len(QUARTER_CACHE)} games.")
+    """Expanded to 120 days to cover almost all teams' last 10 games.
+    Only days missing from the quarter store (or with non-final games) are fetched."""
+    from nba_api.stats.endpoints import scoreboardv2
+    from quarter_store import QuarterStore, board_rows
+    today = run_now().date()
+    start = today - timedelta(days=days)
+    with QuarterStore() as store:
+        final, empty = store.final_days(start, today), store.empty_days(start, today)
+        pending = [today - timedelta(days=i) for i in range(days + 1)
+                   if (today - timedelta(days=i)).isoformat() not in final]
+        print(f"[Prefetch] Quarter store: {days + 1 - len(pending)} final days cached, fetching {len(pending)}...")
+        boards = pmap(lambda d: safe_api_call(scoreboardv2.ScoreboardV2, game_date=d.strftime('%Y-%m-%d')), pending)
+        for d, board in zip(pending, boards):
+            if not board: continue
+            with METRICS.timer('parse'):
+                rows, is_final = board_rows(board, d, today, d.isoformat() in empty)
+            store.save_day(d, rows, is_final, run_now().isoformat())
+        QUARTERS['array'] = store.to_array(start, today)
+    print(f"[Prefetch] Quarter cache built: {len(QUARTERS['array'])} games.")
+
+# --- League-wide Game Log ---
+def fetch_league_frame(season=SEASON_YEAR):
+    """Raw season LeagueGameFinder rows as {'columns', 'data'} (JSON-safe, so it can be checkpointed)."""
+    from nba_api.stats.endpoints import leaguegamefinder
+    obj = safe_api_call(leaguegamefinder.LeagueGameFinder, season_nullable=season, player_or_team_abbreviation='T')
+    if not obj: return None
+    raw = obj.get_data_frames()[0]
+    return {'columns': list(raw.columns), 'data': raw.values.tolist()}
+
+def build_league_log(ckpt=None):
+    """One season-wide LeagueGameFinder pull joined with the quarter array and indexed by team.
+    H2H is sliced from it; TEAM_STATS covers every team's last 10 in one pass, and TEAM_WINDOWS
+    lets the app recompute any other window without the API."""
+    import pandas as pd
+    import game_store
+    import stats_engine
+    from quarter_store import QuarterArray
+    print("[Prefetch] Fetching league game log...")
+    frame = ckpt.stage('league_log', fetch_league_frame) if ckpt else fetch_league_frame()
+    if not frame: return
+    with METRICS.timer('parse'):
+        raw = pd.DataFrame(frame['data'], columns=frame['columns'])
+        df = stats_engine.prepare_log(raw, QUARTERS['array'] or QuarterArray.from_rows([]))
+    # Season history for backtest.py; rewritten each run as the season grows
+    game_store.save_season(SEASON_YEAR, raw)
+    LEAGUE_LOG.clear()
+    LEAGUE_LOG.update({int(tid): g for tid, g in df.groupby('TEAM_ID', sort=False)})
+    last10 = stats_engine.last_n(df, 10)
+    TEAM_LOGS.clear()
+    TEAM_LOGS.update(stats_engine.records_by_team(df))
+    TEAM_WINDOWS.clear()
+    TEAM_WINDOWS.update({tid: stats_engine.window_index(logs) for tid, logs in TEAM_LOGS.items()})
+    TEAM_STATS.clear()
+    TEAM_STATS.update(stats_engine.compute_all_stats(last10))
+    print(f"[Prefetch] League log: {len(df)} team games, {len(LEAGUE_LOG)} teams.")
 
 def get_schedule(date_obj):
+    from nba_api.stats.endpoints import scoreboardv2
     board = safe_api_call(scoreboardv2.ScoreboardV2, game_date=date_obj.strftime('%Y-%m-%d'))
     if not board: return []
-    header = board.game_header.get_data_frame()
+    with METRICS.timer('parse'):
+        header = board.game_header.get_data_frame()
     if header.empty: return []
     
-    games = []
-    for _, row in header.iterrows():
-        games.append({
-            'game_id': row['GAME_ID'],
-            'home_id': int(row['HOME_TEAM_ID']),
-            'visitor_id': int(row['VISITOR_TEAM_ID']),
-            'home_name': TEAM_MAP.get(row['HOME_TEAM_ID'], "Unknown"),
-            'visitor_name': TEAM_MAP.get(row['VISITOR_TEAM_ID'], "Unknown"),
-            'home_abbr': row.get('HOME_TEAM_ABBREVIATION', ''),
-            'visitor_abbr': row.get('VISITOR_TEAM_ABBREVIATION', ''),
-            'game_time': row.get('GAME_STATUS_TEXT', ''),
-            'api_date': date_obj.strftime('%Y-%m-%d')
-        })
-    return games
+    date_str = date_obj.strftime('%Y-%m-%d')
+    return [{
+        'game_id': row['GAME_ID'],
+        'home_id': int(row['HOME_TEAM_ID']),
+        'visitor_id': int(row['VISITOR_TEAM_ID']),
+        'home_name': team_name(row['HOME_TEAM_ID']),
+        'visitor_name': team_name(row['VISITOR_TEAM_ID']),
+        'home_abbr': row.get('HOME_TEAM_ABBREVIATION', ''),
+        'visitor_abbr': row.get('VISITOR_TEAM_ABBREVIATION', ''),
+        'game_time': row.get('GAME_STATUS_TEXT', ''),
+        'api_date': date_str
+    } for row in header.to_dict('records')]
 
 def get_team_l10(team_id):
-    obj = safe_api_call(leaguegamefinder.LeagueGameFinder, team_id_nullable=team_id, season_nullable=SEASON_YEAR)
-    if not obj: return []
-    df = obj.get_data_frames()[0]
-    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
-    df = df.sort_values("GAME_DATE", ascending=False).head(10)
-    
-    logs = []
-    for _, row in df.iterrows():
-        gid = row['GAME_ID']
-        qs = QUARTER_CACHE.get(gid, {})
-        team_q = qs.get(team_id, {})
-        
-        # Robust opponent lookup
-        opp_q = {}
-        for k, v in qs.items():
-            if k != team_id:
-                opp_q = v
-                break
-        
-        pts = int(row['PTS'])
-        pm = row['PLUS_MINUS'] if pd.notna(row['PLUS_MINUS']) else 0
-        opp_pts = int(pts - pm)
-        
-        logs.append({
-            'game_id': gid, 'date': row['GAME_DATE'].strftime('%Y-%m-%d'),
-            'matchup': row['MATCHUP'], 'is_home': 'vs.' in row['MATCHUP'], 'wl': row['WL'].strip(),
-            'pts': pts, 'opp_pts': opp_pts,
-            'pts_1h': team_q.get('pts_1h', 0), 'opp_pts_1h': opp_q.get('pts_1h', 0),
-            'q1': team_q.get('q1', 0), 'q2': team_q.get('q2', 0), 'q3': team_q.get('q3', 0), 'q4': team_q.get('q4', 0),
-            'opp_q1': opp_q.get('q1', 0), 'opp_q2': opp_q.get('q2', 0), 'opp_q3': opp_q.get('q3', 0), 'opp_q4': opp_q.get('q4', 0)
-        })
-    return logs
-
-# (Rest of the helper functions remain similar but stats computation is updated)
+    return TEAM_LOGS.get(team_id, [])[:10]
 
+def get_team_season(team_id):
+    return TEAM_LOGS.get(team_id, [])
+
+# Reference per-team implementation; stats_engine.compute_all_stats must match it exactly
 def compute_stats(logs):
     if not logs: return {}
     pts = [g['pts'] for g in logs]
@@ -147,77 +178,417 @@ def compute_stats(logs):
 
 # Keep original get_h2h, get_leaders, get_injuries
 def get_h2h(t1_id, t2_id):
-    obj = safe_api_call(leaguegamefinder.LeagueGameFinder, team_id_nullable=t1_id, vs_team_id_nullable=t2_id, season_nullable=SEASON_YEAR)
-    if not obj: return []
-    df = obj.get_data_frames()[0]
-    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
-    logs = []
-    for _, row in df.iterrows():
-        gid = row['GAME_ID']
-        qs = QUARTER_CACHE.get(gid, {})
-        t1_q, t2_q = qs.get(t1_id, {}), qs.get(t2_id, {})
-        logs.append({
-            'date': row['GAME_DATE'].strftime('%Y-%m-%d'),
-            't1_pts': int(row['PTS']), 't2_pts': int(row['PTS'] - (row['PLUS_MINUS'] if pd.notna(row['PLUS_MINUS']) else 0)),
-            't1_1h': t1_q.get('pts_1h', 0), 't2_1h': t2_q.get('pts_1h', 0)
-        })
-    return logs
+    df = LEAGUE_LOG.get(t1_id)
+    if df is None: return []
+    import stats_engine
+    return stats_engine.h2h_records(df[df['OPP_TEAM_ID'] == t2_id])
+
+def build_leader_index():
+    """One league-wide per-game player pull, indexed by team (every leader card from one request)."""
+    from nba_api.stats.endpoints import leaguedashplayerstats
+    import stats_engine
+    obj = safe_api_call(leaguedashplayerstats.LeagueDashPlayerStats, season=SEASON_YEAR, per_mode_detailed='PerGame')
+    if not obj: return {}
+    with METRICS.timer('parse'):
+        return stats_engine.leader_index(obj.get_data_frames()[0])
 
 def get_leaders(team_id):
-    obj = safe_api_call(teamplayerdashboard.TeamPlayerDashboard, team_id=team_id, season=SEASON_YEAR, per_mode_detailed='PerGame')
-    if not obj: return {'pts':[], 'reb':[], 'ast':[]}
-    df = obj.get_data_frames()[1]
-    def top2(col):
-        top = df.sort_values(col, ascending=False).head(2)
-        return [{'name': r['PLAYER_NAME'], 'val': round(r[col], 1)} for _, r in top.iterrows()]
-    return {'pts': top2('PTS'), 'reb': top2('REB'), 'ast': top2('AST')}
-
-def get_injuries(team_name):
+    import stats_engine
+    with LEADERS_LOCK:
+        # Only teams whose previous leaders can't be reused get here; a fully reused run makes no call
+        if LEADERS['index'] is None: LEADERS['index'] = build_leader_index()
+    return LEADERS['index'].get(team_id, {key: [] for key in stats_engine.LEADER_STATS})
+
+def fetch_page(url, timeout=10):
+    # Shared session: pooled connection, byte counting and conditional requests come with it
+    res = fetch_engine.SESSION.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=timeout)
+    res.raise_for_status()
+    return res
+
+fetch_page.endpoint = 'injuries'
+
+# --- Injuries (CBS, one fetch per run) ---
+# CBS team links use a few abbreviations of their own
+CBS_ABBR = {'GS': 'GSW', 'NO': 'NOP', 'NY': 'NYK', 'SA': 'SAS', 'PHO': 'PHX', 'UTAH': 'UTA', 'WSH': 'WAS'}
+INJURY_CACHE = {'at': None, 'index': {}}
+INJURY_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def html_parser():
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+def injury_team_id(header):
+    """Match a CBS TeamName header to a team id via the <ABBR>/<slug> after 'teams' in its link
+    (relative or absolute), then its text ("Atlanta", "L.A. Lakers" by nickname)."""
+    keys = get_team_keys()
+    link = header.find('a', href=True)
+    parts = [p for p in urlsplit(link['href']).path.split('/') if p] if link else []
+    if 'teams' in parts:
+        abbr, slug = (parts[parts.index('teams') + 1:] + ['', ''])[:2]
+        if slug in keys: return keys[slug]
+        abbr = CBS_ABBR.get(abbr.upper(), abbr.upper())
+        if abbr in keys: return keys[abbr]
+    text = header.text.strip().lower()
+    return keys.get(text) or keys.get(text.split()[-1] if text else '')
+
+def build_injury_index():
+    """Download and parse the injury page once: {team_id: [{'player', 'status'}]}, None on failure."""
+    from bs4 import BeautifulSoup, SoupStrainer
+    res = safe_api_call(fetch_page, url=INJURY_URL)
+    if res is None: return None
+    with METRICS.timer('parse'):
+        soup = BeautifulSoup(res.content, html_parser(), parse_only=SoupStrainer('div', class_='TableBaseWrapper'))
+    index = {}
+    for table in soup.find_all('div', class_='TableBaseWrapper'):
+        header = table.find('span', class_='TeamName')
+        team_id = injury_team_id(header) if header else None
+        if team_id is None: continue
+        inj = []
+        for row in table.find_all('tr', class_='TableBase-bodyTr'):
+            cols = row.find_all('td')
+            if len(cols) >= 2:
+                p_tag = cols[0].find('span', class_='CellPlayerName--long')
+                p = p_tag.text.strip() if p_tag else cols[0].text.strip()
+                inj.append({'player': p, 'status': cols[-1].text.strip()})
+        index[team_id] = inj
+    return index
+
+def get_injuries(team_id):
+    with INJURY_LOCK:
+        at = INJURY_CACHE['at']
+        if at is None or time.monotonic() - at > INJURY_TTL:
+            index = build_injury_index()
+            # A failed fetch is remembered too (keeping the last index) so the run makes one attempt per TTL
+            INJURY_CACHE.update(at=time.monotonic(), index=INJURY_CACHE['index'] if index is None else index)
+    return INJURY_CACHE['index'].get(team_id, [])
+
+# --- Output ---
+def dump_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def write_json(path, obj):
+    atomic_write_text(path, dump_json(obj))
+
+def write_if_changed(path, obj):
+    """Skip rewriting identical shards so unchanged games keep their mtime and git blob."""
+    text = dump_json(obj)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text: return
+    except OSError: pass
+    atomic_write_text(path, text)
+
+def load_previous(data_dir=DATA_DIR):
+    """Last run's output rebuilt from data/ as ({team_ref: block}, {game_id: game}).
+    Missing or unreadable shards are simply not reused."""
+    def read(*parts):
+        try:
+            with open(os.path.join(data_dir, *parts), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    manifest = read('manifest.json') or {}
+    games = {}
+    for day in manifest.get('dates', {}).values():
+        for entry in day:
+            game = read('games', f"{entry['game_id']}.json")
+            if game: games[game['game_id']] = game
+    refs = {g[side]['ref'] for g in games.values() for side in ('home', 'visitor')}
+    teams = {ref: block for ref, block in ((r, read('teams', f"{r}.json")) for r in sorted(refs)) if block}
+    return teams, games
+
+def write_shards(payload, out_dir=DATA_DIR):
+    """Manifest (dates -> game ids -> labels) plus one small file per game and per team block.
+    The manifest goes out after every shard it lists (the app watches its mtime); shards it
+    no longer lists are removed only after that."""
+    for sub in ('games', 'teams'):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+    keep = set()
+    for ref, block in payload['teams'].items():
+        keep.add(os.path.join('teams', f"{ref}.json"))
+        write_if_changed(os.path.join(out_dir, 'teams', f"{ref}.json"), block)
+    dates = {}
+    for g in payload['games']:
+        keep.add(os.path.join('games', f"{g['game_id']}.json"))
+        write_if_changed(os.path.join(out_dir, 'games', f"{g['game_id']}.json"), g)
+        dates.setdefault(g['api_date'], []).append(
+            {'game_id': g['game_id'], 'label': f"{g['visitor']['name']} @ {g['home']['name']}"})
+    write_json(os.path.join(out_dir, 'manifest.json'), {'last_updated': payload['last_updated'], 'dates': dates})
+    for sub in ('games', 'teams'):
+        for name in os.listdir(os.path.join(out_dir, sub)):
+            if os.path.join(sub, name) not in keep:
+                os.remove(os.path.join(out_dir, sub, name))
+
+# --- Fingerprints (incremental runs) ---
+FORMAT_VERSION = 4  # bump when block/game layout changes so old output is never reused
+
+def fingerprint(*parts):
+    return hashlib.sha1(dump_json([FORMAT_VERSION, *parts]).encode('utf-8')).hexdigest()[:16]
+
+def last_game_id(team_id):
+    df = LEAGUE_LOG.get(team_id)
+    return df['GAME_ID'].iloc[0] if df is not None and len(df) else None
+
+def team_fingerprint(team_id):
+    # Logs carry the line scores, so late-final quarters move the fingerprint too
+    return fingerprint(last_game_id(team_id), get_team_season(team_id), get_injuries(team_id))
+
+# --- Shards (parallel runs) ---
+PARTIAL_DIR = "partial"
+
+def parse_shard(text):
+    """'i/n' -> (i, n) with 0 <= i < n."""
     try:
-        url = "https://www.cbssports.com/nba/injuries/"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(res.content, 'html.parser')
-        search = team_name.split(' ')[0].lower()
-        for table in soup.find_all('div', class_='TableBaseWrapper'):
-            header = table.find('span', class_='TeamName')
-            if header and search in header.text.lower():
-                inj = []
-                for row in table.find_all('tr', class_='TableBase-bodyTr'):
-                    cols = row.find_all('td')
-                    if len(cols) >= 2:
-                        p_tag = cols[0].find('span', class_='CellPlayerName--long')
-                        p = p_tag.text.strip() if p_tag else cols[0].text.strip()
-                        inj.append({'player': p, 'status': cols[-1].text.strip()})
-                return inj
-        return []
-    except: return []
-
-def main():
-    now = datetime.now(ISTANBUL_TZ)
-    print(f"[Prefetch] Start: {now.isoformat()}")
-    build_quarter_cache(120) 
+        i, n = map(int, text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {text!r}")
+    if not 0 <= i < n: raise argparse.ArgumentTypeError(f"shard index must be in 0..{n - 1}")
+    return i, n
+
+def shard_of(key, n):
+    # crc32, not hash(): str hashes are salted per process and every shard must agree
+    return zlib.crc32(str(key).encode('utf-8')) % n
+
+def partial_path(i, n, root=PARTIAL_DIR):
+    return os.path.join(root, f"shard-{i}-of-{n}.json")
+
+def merge_partials(root=PARTIAL_DIR):
+    """Build data/ and the run report from every shard's partial output.
+    Teams come out in team id order and games in schedule order, exactly as a serial run writes them."""
+    try: names = sorted(n for n in os.listdir(root) if n.startswith('shard-') and n.endswith('.json'))
+    except OSError: names = []
+    parts = []
+    for name in names:
+        with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+            parts.append(json.load(f))
+    if not parts: raise SystemExit(f"[Merge] No partial outputs in {root}/")
+    counts = {p['shard'][1] for p in parts}
+    if len(counts) > 1: raise SystemExit(f"[Merge] Partials from different shard counts {sorted(counts)}; clear {root}/ and rerun")
+    n = counts.pop()
+    parts.sort(key=lambda p: p['shard'][0])
+    missing = sorted(set(range(n)) - {p['shard'][0] for p in parts})
+    if missing: raise SystemExit(f"[Merge] Missing shard(s) {', '.join(f'{i}/{n}' for i in missing)}")
+    schedule = parts[0]['schedule']
+    if any(p['schedule'] != schedule for p in parts):
+        raise SystemExit("[Merge] Shards saw different schedules; rerun them with the same PREFETCH_NOW")
+
+    teams = {ref: block for p in parts for ref, block in p['teams'].items()}
+    games = {g['game_id']: g for p in parts for g in p['games']}
+    refs = {g[side]['ref'] for g in games.values() for side in ('home', 'visitor')}
+    if set(schedule) - set(games) or refs - set(teams):
+        raise SystemExit(f"[Merge] Incomplete partials: games {sorted(set(schedule) - set(games))}, teams {sorted(refs - set(teams))}")
+    payload = {'last_updated': max(p['last_updated'] for p in parts),
+               'teams': dict(sorted(teams.items(), key=lambda kv: kv[1]['id'])),
+               'games': [games[gid] for gid in schedule]}
+    write_shards(payload)
+    write_json(REPORT_FILE, {'merged_shards': n, 'shards': [p['report'] for p in parts]})
+    print(f"[Merge] Saved {len(payload['games'])} games, {len(payload['teams'])} team blocks from {n} shards.")
+
+# --- Per-run Team Cache ---
+class TeamCache:
+    """Team blocks (logs, stats, leaders, injuries) memoized per run by (team_id, as_of_date).
+    Given last run's block, it is reused verbatim when the team's fingerprint has not moved."""
+
+    def __init__(self):
+        self.blocks = {}
+        self.lock = threading.Lock()
+
+    def get(self, team_id, as_of, previous=None):
+        key = (team_id, as_of)
+        with self.lock:
+            if key in self.blocks: return self.blocks[key]
+        logs, injuries, latest = get_team_season(team_id), get_injuries(team_id), last_game_id(team_id)
+        fp = team_fingerprint(team_id)
+        if previous and previous.get('fingerprint') == fp:
+            block = previous
+        else:
+            # Per-game leader averages only move when the team plays: keep last run's snapshot otherwise
+            # (and only if that snapshot is complete: a failed pull or an older layout is refetched)
+            from stats_engine import LEADER_STATS
+            same_game = previous and previous.get('last_game_id') == latest and \
+                any(previous.get('leaders', {}).values()) and set(LEADER_STATS) <= set(previous['leaders'])
+            block = {
+                'id': team_id, 'name': team_name(team_id), 'as_of': as_of.isoformat(),
+                'season_logs': logs, 'log_rows': table_rows(logs, LOG_FIELDS), 'windows': TEAM_WINDOWS.get(team_id, {}), 'stats': TEAM_STATS.get(team_id, {}),
+                'leaders': previous['leaders'] if same_game else get_leaders(team_id), 'injuries': injuries,
+                'last_game_id': latest, 'fingerprint': fp
+            }
+        with self.lock:
+            return self.blocks.setdefault(key, block)
+
+    def invalidate(self, team_id=None, as_of=None):
+        """Drop cached blocks matching team_id and/or as_of (everything when both are None)."""
+        with self.lock:
+            for key in [k for k in self.blocks if team_id in (None, k[0]) and as_of in (None, k[1])]:
+                del self.blocks[key]
+
+TEAM_CACHE = TeamCache()
+
+def reset_caches():
+    """Forget all per-run state (used by replays and benchmarks that run main() repeatedly)."""
+    for cache in (LEAGUE_LOG, TEAM_LOGS, TEAM_WINDOWS, TEAM_STATS):
+        cache.clear()
+    QUARTERS['array'] = None
+    TEAM_CACHE.invalidate()
+    LEADERS['index'] = None
+    INJURY_CACHE.update(at=None, index={})
+
+def team_ref(team_id):
+    return str(team_id)
+
+def main(incremental=True, resume=True, shard=None):
+    """Full run, or with shard=(i, n) only the teams and games hashed to shard i, written to
+    partial/ for merge_partials. Shared stages (quarters, league log, schedule) run in every shard."""
+    now = run_now()
+    METRICS.reset()
+    LEADERS['index'] = None
+    print(f"[Prefetch] Start: {now.isoformat()}" + (f" (shard {shard[0]}/{shard[1]})" if shard else ""))
+    # Quarter scores are durable in the store already; the rest resumes from today's checkpoint
+    key = now.date().isoformat() + (f".shard-{shard[0]}-of-{shard[1]}" if shard else "")
+    ckpt = Checkpoint(key, enabled=resume)
+    with METRICS.stage('quarter_cache'):
+        build_quarter_cache(120) 
+    with METRICS.stage('league_log'):
+        build_league_log(ckpt)
     dates = [now.date() - timedelta(days=1), now.date(), now.date() + timedelta(days=1)]
-    raw = []
-    for d in dates: raw.extend(get_schedule(d))
+    with METRICS.stage('schedule'):
+        raw = ckpt.stage('schedule', lambda: [g for games in pmap(get_schedule, dates) for g in games])
     seen = set()
     uniq = [g for g in raw if not (g['game_id'] in seen or seen.add(g['game_id']))]
-    enriched = []
-    for i, g in enumerate(uniq):
-        print(f"  [{i+1}/{len(uniq)}] {g['visitor_name']} @ {g['home_name']}")
+    schedule = [g['game_id'] for g in uniq]
+    if shard:
+        uniq = [g for g in uniq if shard_of(g['game_id'], shard[1]) == shard[0]]
+
+    # Most teams play twice in the window; build each team block once and share it
+    as_of = now.date()
+    prev_teams, prev_games = load_previous() if incremental else ({}, {})
+    team_ids = sorted({g['home_id'] for g in raw} | {g['visitor_id'] for g in raw})
+    if shard:
+        team_ids = [t for t in team_ids if shard_of(t, shard[1]) == shard[0]]
+    print(f"[Prefetch] Enriching {len(team_ids)} teams for {len(uniq)} games...")
+    def build_team(tid, ref):
+        # A block finished by an interrupted run today stands in for last run's block
+        previous = ckpt.load(f"teams/{ref}") or prev_teams.get(ref)
+        block = TEAM_CACHE.get(tid, as_of, previous)
+        return block if block is previous else ckpt.save(f"teams/{ref}", block)
+    with METRICS.stage('team_enrichment'):
+        refs = list(map(team_ref, team_ids))
+        blocks = dict(zip(refs, pmap(lambda tr: build_team(*tr), zip(team_ids, refs))))
+
+    def team_fp(tid):
+        # A shard's games may pair teams enriched by another shard: their fingerprint is cheap to redo
+        block = blocks.get(team_ref(tid))
+        return block['fingerprint'] if block else team_fingerprint(tid)
+    def enrich(g):
         h_id, v_id = g['home_id'], g['visitor_id']
-        h_l10, v_l10 = get_team_l10(h_id), get_team_l10(v_id)
+        fp = fingerprint(team_fp(h_id), team_fp(v_id), g['game_time'], g['api_date'])
+        prev = ckpt.load(f"games/{g['game_id']}") or prev_games.get(g['game_id'])
+        if prev and prev.get('fingerprint') == fp: return prev
         h2h = get_h2h(h_id, v_id)
-        h_stats, v_stats = compute_stats(h_l10), compute_stats(v_l10)
         h2h_avg = {'home_avg': round(sum(x['t1_pts'] for x in h2h)/len(h2h), 1), 'visitor_avg': round(sum(x['t2_pts'] for x in h2h)/len(h2h), 1)} if h2h else {}
-        enriched.append({
+        return {
             'game_id': g['game_id'], 'api_date': g['api_date'], 'game_time': g['game_time'],
-            'home': {'id': h_id, 'name': g['home_name'], 'last10_logs': h_l10, 'stats': h_stats, 'leaders': get_leaders(h_id), 'injuries': get_injuries(g['home_name'])},
-            'visitor': {'id': v_id, 'name': g['visitor_name'], 'last10_logs': v_l10, 'stats': v_stats, 'leaders': get_leaders(v_id), 'injuries': get_injuries(g['visitor_name'])},
-            'h2h_logs': h2h, 'h2h_stats': h2h_avg
-        })
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump({'last_updated': now.isoformat(), 'games': enriched}, f, ensure_ascii=False, indent=2)
-    print(f"[Prefetch] Saved {len(enriched)} games.")
-
-if __name__ == "__main__": main()
+            'home': {'id': h_id, 'name': g['home_name'], 'ref': team_ref(h_id)},
+            'visitor': {'id': v_id, 'name': g['visitor_name'], 'ref': team_ref(v_id)},
+            'h2h_logs': h2h, 'h2h_rows': table_rows(h2h, H2H_FIELDS), 'h2h_stats': h2h_avg, 'fingerprint': fp
+        }
+    def enrich_saved(g):
+        game = enrich(g)
+        return game if game is prev_games.get(g['game_id']) else ckpt.save(f"games/{g['game_id']}", game)
+    with METRICS.stage('game_enrichment'):
+        enriched = pmap(enrich_saved, uniq)
+    changes = {
+        'recomputed_teams': [r for r in refs if blocks[r] is not prev_teams.get(r)],
+        'recomputed_games': [g['game_id'] for g in enriched if g is not prev_games.get(g['game_id'])],
+    }
+    changes.update(reused_teams=len(refs) - len(changes['recomputed_teams']),
+                   reused_games=len(enriched) - len(changes['recomputed_games']))
+    print(f"[Prefetch] Recomputed {len(changes['recomputed_teams'])}/{len(refs)} teams, "
+          f"{len(changes['recomputed_games'])}/{len(enriched)} games" + ("" if incremental else " (full run)"))
+    payload = {'last_updated': now.isoformat(), 'teams': blocks, 'games': enriched}
+    METRICS.note(games=len(enriched), teams=len(blocks), incremental=incremental, changes=changes,
+                 resumed_checkpoints=ckpt.hits, shard=list(shard) if shard else None)
+    with METRICS.stage('write'):
+        if shard:
+            # The report rides in the partial (merge collects them), so parallel shards never race on one file
+            os.makedirs(PARTIAL_DIR, exist_ok=True)
+            write_json(partial_path(*shard), {**payload, 'shard': list(shard), 'schedule': schedule,
+                                              'report': METRICS.report()})
+        else:
+            write_shards(payload)
+    # Everything is on disk: the next run starts clean
+    ckpt.clear()
+    print(f"[Prefetch] Saved {len(enriched)} games, {len(blocks)} team blocks"
+          + (f" to {partial_path(*shard)}." if shard else "."))
+    if not shard: write_json(REPORT_FILE, METRICS.report())
+
+def run_profiled(func):
+    """PREFETCH_PROFILE=cprofile|pyinstrument wraps the run and saves the profile in the working directory."""
+    mode = os.environ.get("PREFETCH_PROFILE", "").lower()
+    if mode == "cprofile":
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(func)
+        profiler.dump_stats("prefetch.prof")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    elif mode == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        with profiler:
+            func()
+        with open("prefetch_profile.html", "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        print(profiler.output_text())
+    else:
+        func()
+
+def run_backfill(args):
+    import backfill
+    if args.rate: fetch_engine.LIMITER = fetch_engine.RateLimiter(args.rate, fetch_engine.BURST)
+    METRICS.reset()
+    now = run_now()
+    _, failed = backfill.backfill(args.start, args.end or now.date(), now.date(), now.isoformat(),
+                                  refetch=args.refetch, concurrency=args.concurrency)
+    write_json("backfill_report.json", METRICS.report())
+    return 1 if failed else 0
+
+def run_live(args):
+    import live
+    METRICS.reset()
+    live.run(run_now, DATA_DIR, args.interval, args.polls)
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefetch NBA data into data/")
+    parser.add_argument('--full', action='store_true', help='ignore the previous output and rebuild every game')
+    parser.add_argument('--no-resume', action='store_true', help="discard checkpoints left by an interrupted run")
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help=f'enrich only shard I of N into {PARTIAL_DIR}/ (combine them with the merge command)')
+    sub = parser.add_subparsers(dest='cmd')
+    sub.add_parser('run', help='daily prefetch (default)')
+    p_back = sub.add_parser('backfill', help='crawl historical line scores into the quarter store')
+    p_back.add_argument('--from', dest='start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(), required=True)
+    p_back.add_argument('--to', dest='end', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(), help='default: today')
+    p_back.add_argument('--concurrency', type=int, default=16, help='requests in flight')
+    p_back.add_argument('--rate', type=float, help='requests per second (default PREFETCH_RATE)')
+    p_back.add_argument('--refetch', action='store_true', help='fetch days already stored as final too')
+    p_live = sub.add_parser('live', help="poll line scores of the slate's games in play into data/live/")
+    p_live.add_argument('--interval', type=float, default=30, help='seconds between polls')
+    p_live.add_argument('--polls', type=int, help='stop after this many polls (default: until every game is final)')
+    p_merge = sub.add_parser('merge', help='combine shard partials into data/')
+    p_merge.add_argument('--dir', default=PARTIAL_DIR, help=f'partial outputs (default {PARTIAL_DIR}/)')
+    args = parser.parse_args()
+    if args.cmd == 'backfill':
+        raise SystemExit(run_backfill(args))
+    if args.cmd == 'live':
+        raise SystemExit(run_live(args))
+    if args.cmd == 'merge':
+        raise SystemExit(merge_partials(args.dir))
+    # A shard leaves its siblings' checkpoints alone (its own are skipped and replaced via resume=False)
+    if args.no_resume and not args.shard: Checkpoint('').clear()
+    run_profiled(lambda: main(incremental=not args.full, resume=not args.no_resume, shard=args.shard))
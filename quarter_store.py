@@ -0,0 +1,139 @@
+"""
+CANOBURO ANALİZ - Quarter Score Store
+On-disk SQLite store for scoreboard line scores, keyed by date and GAME_ID.
+Days whose games are all final are never fetched again.
+QuarterArray is the in-memory view used for lookups and joins.
+"""
+
+import sqlite3
+import numpy as np
+
+STORE_FILE = "quarter_scores.db"
+# One record per game, both teams side by side: team_id[side], q[side, quarter]
+QUARTER_DTYPE = np.dtype([('game_id', 'S12'), ('team_id', '<i8', (2,)), ('q', '<i2', (2, 4))])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    day TEXT PRIMARY KEY,
+    final INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS line_scores (
+    game_id TEXT NOT NULL,
+    team_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    q1 INTEGER NOT NULL, q2 INTEGER NOT NULL, q3 INTEGER NOT NULL, q4 INTEGER NOT NULL,
+    PRIMARY KEY (game_id, team_id)
+);
+CREATE INDEX IF NOT EXISTS line_scores_day ON line_scores (day);
+"""
+
+
+def board_rows(board, day, today, seen_empty=False):
+    """ScoreboardV2 result -> (line score rows for save_day, is_final).
+    A past day without games is final only once it comes back empty a second time (seen_empty),
+    so one transient empty response can't drop a game day for good; today's may still get games."""
+    header = board.game_header.get_data_frame()
+    lines = board.line_score.get_data_frame()
+    q = lines.reindex(columns=['PTS_QTR1', 'PTS_QTR2', 'PTS_QTR3', 'PTS_QTR4']).fillna(0).astype(int)
+    rows = list(zip(lines['GAME_ID'], lines['TEAM_ID'].astype(int).tolist(), *(q[c].tolist() for c in q.columns)))
+    is_final = bool((header['GAME_STATUS_ID'] == 3).all()) if not header.empty else day < today and seen_empty
+    return rows, is_final
+
+
+class QuarterStore:
+    def __init__(self, path=STORE_FILE):
+        # Shard processes share the file; wait out each other's short write transactions
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def final_days(self, start, end):
+        """ISO dates in [start, end] that were stored with every game final."""
+        cur = self.conn.execute(
+            "SELECT day FROM days WHERE final = 1 AND day BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat()))
+        return {r[0] for r in cur}
+
+    def empty_days(self, start, end):
+        """ISO dates in [start, end] stored without games and not yet final (seen empty once)."""
+        cur = self.conn.execute(
+            "SELECT day FROM days WHERE final = 0 AND day BETWEEN ? AND ? "
+            "AND NOT EXISTS (SELECT 1 FROM line_scores WHERE line_scores.day = days.day)",
+            (start.isoformat(), end.isoformat()))
+        return {r[0] for r in cur}
+
+    def save_day(self, day, rows, final, fetched_at):
+        """Replace one day's line scores. rows: (game_id, team_id, q1, q2, q3, q4)."""
+        d = day.isoformat()
+        with self.conn:
+            self.conn.execute("DELETE FROM line_scores WHERE day = ?", (d,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO line_scores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(gid, tid, d, q1, q2, q3, q4) for gid, tid, q1, q2, q3, q4 in rows])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO days VALUES (?, ?, ?)", (d, int(final), fetched_at))
+
+    def to_array(self, start, end):
+        """QuarterArray of every game in [start, end]."""
+        cur = self.conn.execute(
+            "SELECT game_id, team_id, q1, q2, q3, q4 FROM line_scores WHERE day BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat()))
+        return QuarterArray.from_rows(cur.fetchall())
+
+
+class QuarterArray:
+    """Line scores as a structured array sorted by game id: a game is found by binary search and
+    the opponent is the other side of the same record."""
+
+    def __init__(self, arr):
+        self.arr = arr
+
+    def __len__(self):
+        return len(self.arr)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: (game_id, team_id, q1, q2, q3, q4); a game with a single row gets an empty other side."""
+        if not rows: return cls(np.zeros(0, QUARTER_DTYPE))
+        gids = np.array([r[0] for r in rows], dtype='S12')
+        tids = np.array([r[1] for r in rows], dtype=np.int64)
+        qs = np.array([r[2:6] for r in rows], dtype=np.int16)
+        order = np.lexsort((tids, gids))
+        gids, tids, qs = gids[order], tids[order], qs[order]
+        uniq, first, counts = np.unique(gids, return_index=True, return_counts=True)
+        arr = np.zeros(len(uniq), QUARTER_DTYPE)
+        arr['game_id'] = uniq
+        arr['team_id'][:, 0], arr['q'][:, 0] = tids[first], qs[first]
+        pair = counts > 1
+        arr['team_id'][pair, 1], arr['q'][pair, 1] = tids[first[pair] + 1], qs[first[pair] + 1]
+        return cls(arr)
+
+    @classmethod
+    def from_cache(cls, cache):
+        """From the old {game_id: {team_id: {'q1'..'q4'}}} dict layout."""
+        return cls.from_rows([(gid, tid, v['q1'], v['q2'], v['q3'], v['q4'])
+                              for gid, qs in cache.items() for tid, v in qs.items()])
+
+    def lookup(self, game_ids, team_ids):
+        """Vectorized join: (own (n, 4), opponent (n, 4)) quarters per (game, team); zeros when missing."""
+        keys = np.asarray(game_ids).astype('S12')
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        n = len(keys)
+        if not len(self.arr) or not n: return np.zeros((n, 4), np.int64), np.zeros((n, 4), np.int64)
+        pos = np.minimum(np.searchsorted(self.arr['game_id'], keys), len(self.arr) - 1)
+        rec = self.arr[pos]
+        side = (rec['team_id'][:, 1] == team_ids).astype(np.intp)
+        found = (rec['game_id'] == keys) & (rec['team_id'][np.arange(n), side] == team_ids)
+        rows = np.arange(n)
+        own = np.where(found[:, None], rec['q'][rows, side], 0).astype(np.int64)
+        opp = np.where(found[:, None], rec['q'][rows, 1 - side], 0).astype(np.int64)
+        return own, opp
@@ -0,0 +1,299 @@
+"""
+CANOBURO ANALİZ - Record / Replay Harness
+Records real stats.nba.com and CBS responses into a fixture file, then serves them from a
+local stand-in server with configurable latency and failure injection.
+
+    python replay.py record --out fixtures/run.jsonl.gz     # live prefetch run, responses captured
+    python replay.py serve --fixtures fixtures/run.jsonl.gz --latency 0.1 --fail-rate 0.05
+    python replay.py record-live --out fixtures/live.jsonl.gz  # a game night's boards, poll by poll
+    python replay.py serve --fixtures fixtures/live.jsonl.gz --sequence
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+import requests
+
+
+def request_key(url):
+    """(endpoint, sorted query) - the last path segment names the endpoint for both hosts."""
+    parts = urlsplit(url)
+    endpoint = [p for p in parts.path.split('/') if p][-1].lower()
+    return endpoint, tuple(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+
+# --- Recording ---
+class Recorder:
+    """Captures every requests.Session response while active (nba_api and requests.get both use it)."""
+
+    def __init__(self):
+        self.entries = []
+        self.lock = threading.Lock()
+        self._send = None
+
+    def __enter__(self):
+        self._send = send = requests.Session.send
+        recorder = self
+
+        def recording_send(session, request, **kwargs):
+            response = send(session, request, **kwargs)
+            endpoint, query = request_key(request.url)
+            with recorder.lock:
+                recorder.entries.append({
+                    'endpoint': endpoint, 'query': query, 'status': response.status_code,
+                    'content_type': response.headers.get('Content-Type', 'application/json'),
+                    'body': response.text,
+                })
+            return response
+
+        requests.Session.send = recording_send
+        return self
+
+    def __exit__(self, *exc):
+        requests.Session.send = self._send
+
+    def save(self, path, meta=None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'meta': meta or {}}) + '\n')
+            for e in self.entries:
+                f.write(json.dumps(e, ensure_ascii=False) + '\n')
+
+
+def load_sequences(path):
+    """(meta, {(endpoint, query): [entries in recorded order]})."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        meta = json.loads(f.readline())['meta']
+        sequences = {}
+        for line in f:
+            e = json.loads(line)
+            sequences.setdefault((e['endpoint'], tuple(map(tuple, e['query']))), []).append(e)
+    return meta, sequences
+
+
+def load_fixtures(path):
+    """(meta, {(endpoint, query): entry}); later recordings of the same request win."""
+    meta, sequences = load_sequences(path)
+    return meta, {key: entries[-1] for key, entries in sequences.items()}
+
+
+class FixtureResponder:
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+
+    def __call__(self, endpoint, query):
+        e = self.fixtures.get((endpoint, query))
+        if e is None: return None
+        return e['status'], e['content_type'], e['body']
+
+
+class SequenceResponder:
+    """Replays a progression: each repeat of a request gets the next recorded response and the
+    last one sticks (a live poller sees the game move on, then end). Unknown requests go to fallback."""
+
+    def __init__(self, sequences, fallback=None):
+        self.sequences = sequences
+        self.fallback = fallback
+        self.served = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint, query):
+        entries = self.sequences.get((endpoint, query))
+        if entries is None: return self.fallback(endpoint, query) if self.fallback else None
+        with self.lock:
+            e = entries[min(self.served[(endpoint, query)], len(entries) - 1)]
+            self.served[(endpoint, query)] += 1
+        return e['status'], e['content_type'], e['body']
+
+
+# --- Stand-in Server ---
+class ReplayServer:
+    """Local HTTP stand-in. responder(endpoint, query) -> (status, content_type, body) or None (404).
+    Every request waits `latency` (+/- `jitter`) seconds; `fail_rate` of them answer `fail_status`.
+    With `etags`, 200s carry a body hash ETag and a matching If-None-Match gets a bodiless 304."""
+
+    def __init__(self, responder, latency=0.0, jitter=0.0, fail_rate=0.0, fail_status=429, seed=0, port=0,
+                 etags=True):
+        self.responder = responder
+        self.etags = etags
+        self.latency, self.jitter = latency, jitter
+        self.fail_rate, self.fail_status = fail_rate, fail_status
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.failures = Counter()
+        self.misses = Counter()
+        self.not_modified = Counter()
+        self.bytes_sent = 0
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+
+            def do_GET(self):
+                endpoint, query = request_key(self.path)
+                with server.lock:
+                    server.requests[endpoint] += 1
+                    delay = max(0.0, server.latency + server.rng.uniform(-server.jitter, server.jitter))
+                    fail = server.rng.random() < server.fail_rate
+                if delay: time.sleep(delay)
+                if fail:
+                    with server.lock: server.failures[endpoint] += 1
+                    self.send_response(server.fail_status)
+                    self.end_headers()
+                    return
+                found = server.responder(endpoint, query)
+                if found is None:
+                    with server.lock: server.misses[endpoint] += 1
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                status, content_type, body = found
+                data = body.encode('utf-8')
+                etag = f'"{hashlib.sha1(data).hexdigest()[:16]}"' if server.etags and status == 200 else None
+                if etag and self.headers.get('If-None-Match') == etag:
+                    with server.lock: server.not_modified[endpoint] += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                with server.lock: server.bytes_sent += len(data)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                if etag: self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self.lock:
+            return {'requests': dict(self.requests), 'total_requests': sum(self.requests.values()),
+                    'failures': dict(self.failures), 'misses': dict(self.misses),
+                    'not_modified': dict(self.not_modified), 'bytes_sent': self.bytes_sent}
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests.clear(); self.failures.clear(); self.misses.clear(); self.not_modified.clear()
+            self.bytes_sent = 0
+
+
+def point_prefetch_at(url):
+    """Route nba_api and the injury fetch of an imported prefetch_data to the stand-in at url."""
+    import fetch_engine
+    import prefetch_data
+    os.environ['NBA_STATS_BASE_URL'] = f"{url}/stats"
+    os.environ['INJURY_URL'] = prefetch_data.INJURY_URL = f"{url}/nba/injuries/"
+    fetch_engine.configure_nba_api()
+
+
+# --- CLI ---
+def record(out):
+    import fetch_engine
+    import prefetch_data
+    # Fixtures need full bodies: no local cache hits or 304s while recording
+    os.environ['PREFETCH_HTTP_CACHE'] = ''
+    fetch_engine.configure_nba_api()
+    # ... nor reuse of local stores, checkpoints or the previous data/: run in an empty directory
+    out, old_cwd = os.path.abspath(out), os.getcwd()
+    with Recorder() as rec, tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            now = prefetch_data.run_now()
+            prefetch_data.main(incremental=False, resume=False)
+        finally:
+            os.chdir(old_cwd)
+    rec.save(out, meta={'now': now.isoformat(), 'season': prefetch_data.SEASON_YEAR})
+    print(f"[Replay] Recorded {len(rec.entries)} responses -> {out}")
+
+
+def record_live(out, interval, polls):
+    import fetch_engine
+    import live
+    import prefetch_data
+    os.environ['PREFETCH_HTTP_CACHE'] = ''
+    fetch_engine.configure_nba_api()
+    with Recorder() as rec:
+        now = prefetch_data.run_now()
+        live.run(prefetch_data.run_now, prefetch_data.DATA_DIR, interval, polls)
+    rec.save(out, meta={'now': now.isoformat(), 'season': prefetch_data.SEASON_YEAR, 'live': True})
+    print(f"[Replay] Recorded {len(rec.entries)} responses -> {out}")
+
+
+def serve(path, port, sequence=False, **opts):
+    meta, fixtures = (load_sequences if sequence else load_fixtures)(path)
+    server = ReplayServer((SequenceResponder if sequence else FixtureResponder)(fixtures), port=port, **opts)
+    print(f"[Replay] Serving {len(fixtures)} fixtures on {server.url} (recorded at {meta.get('now')})")
+    print(f"  NBA_STATS_BASE_URL={server.url}/stats INJURY_URL={server.url}/nba/injuries/ PREFETCH_NOW={meta.get('now', '')}")
+    server.start()
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats(), indent=2))
+        server.stop()
+
+
+def add_server_args(parser):
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of requests answered with --fail-status')
+    parser.add_argument('--fail-status', type=int, default=429)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_rec = sub.add_parser('record', help='run prefetch live and capture every response')
+    p_rec.add_argument('--out', default='fixtures/run.jsonl.gz')
+    p_srv = sub.add_parser('serve', help='serve recorded fixtures locally')
+    p_srv.add_argument('--fixtures', default='fixtures/run.jsonl.gz')
+    p_srv.add_argument('--port', type=int, default=8765)
+    p_srv.add_argument('--sequence', action='store_true',
+                       help='replay repeated requests in recorded order (live recordings) instead of the last one')
+    add_server_args(p_srv)
+    p_live = sub.add_parser('record-live', help='run the live poller against the real API and capture every board')
+    p_live.add_argument('--out', default='fixtures/live.jsonl.gz')
+    p_live.add_argument('--interval', type=float, default=30)
+    p_live.add_argument('--polls', type=int, help='stop after this many polls (default: until every game is final)')
+    args = parser.parse_args()
+    if args.cmd == 'record':
+        record(args.out)
+    elif args.cmd == 'record-live':
+        record_live(args.out, args.interval, args.polls)
+    else:
+        serve(args.fixtures, args.port, sequence=args.sequence, latency=args.latency, jitter=args.jitter,
+              fail_rate=args.fail_rate, fail_status=args.fail_status, seed=args.seed)
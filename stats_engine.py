@@ -0,0 +1,171 @@
+"""
+CANOBURO ANALİZ - Vectorized Stats Engine
+Joins the league game log with line scores and computes every team's card stats in one grouped NumPy pass.
+Values match prefetch_data.compute_stats exactly (zero quarters are skipped the same way).
+"""
+
+import numpy as np
+import pandas as pd
+
+Q_COLS = ['q1', 'q2', 'q3', 'q4']
+OPP_Q_COLS = [f'opp_{q}' for q in Q_COLS]
+LOG_COLS = ['game_id', 'date', 'matchup', 'is_home', 'wl', 'pts', 'opp_pts',
+            'pts_1h', 'opp_pts_1h', *Q_COLS, *OPP_Q_COLS]
+
+
+def prepare_log(df, quarters):
+    """Raw LeagueGameFinder frame + QuarterArray -> newest-first log with opponent id, points and quarters."""
+    df = df.copy()
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    # Both sides of a game share GAME_ID, so the opponent is the game's id sum minus our own
+    df['OPP_TEAM_ID'] = df.groupby('GAME_ID')['TEAM_ID'].transform('sum') - df['TEAM_ID']
+    df = df.sort_values('GAME_DATE', ascending=False).reset_index(drop=True)
+    own, opp = quarters.lookup(df['GAME_ID'].to_numpy(), df['TEAM_ID'].to_numpy())
+    df[Q_COLS], df[OPP_Q_COLS] = own, opp
+    df['pts_1h'] = own[:, 0] + own[:, 1]
+    df['opp_pts_1h'] = opp[:, 0] + opp[:, 1]
+    df['game_id'] = df['GAME_ID']
+    df['date'] = df['GAME_DATE'].dt.strftime('%Y-%m-%d')
+    df['matchup'] = df['MATCHUP']
+    df['is_home'] = df['MATCHUP'].str.contains('vs.', regex=False)
+    df['wl'] = df['WL'].fillna('').str.strip()
+    df['pts'] = df['PTS'].astype(int)
+    df['opp_pts'] = (df['PTS'] - df['PLUS_MINUS'].fillna(0)).astype(int)
+    return df
+
+
+def last_n(df, n=10):
+    """First n rows of every team in a newest-first log."""
+    return df[df.groupby('TEAM_ID').cumcount() < n]
+
+
+def h2h_records(df):
+    out = df[['date', 'pts', 'opp_pts', 'pts_1h', 'opp_pts_1h']]
+    return out.rename(columns={'pts': 't1_pts', 'opp_pts': 't2_pts', 'pts_1h': 't1_1h', 'opp_pts_1h': 't2_1h'}).to_dict('records')
+
+
+def records_by_team(df):
+    """{team_id: [log dicts]} with a single to_dict pass, keeping the frame's row order."""
+    out = {}
+    for tid, rec in zip(df['TEAM_ID'].tolist(), df[LOG_COLS].to_dict('records')):
+        out.setdefault(int(tid), []).append(rec)
+    return out
+
+
+def compute_all_stats(logs):
+    """{team_id: stats} for every team in a (last-n) log frame, in one grouped pass."""
+    if logs.empty: return {}
+    codes, team_ids = pd.factorize(logs['TEAM_ID'])
+    n = len(team_ids)
+
+    def col(name): return logs[name].to_numpy(dtype=np.int64)
+    def group_sum(x): return np.bincount(codes, weights=x, minlength=n)
+    def group_count(mask): return np.bincount(codes, weights=mask, minlength=n).astype(np.int64)
+
+    def group_extreme(x, mask, ufunc, start):
+        out = np.full(n, start, dtype=np.int64)
+        ufunc.at(out, codes[mask], x[mask])
+        return out
+
+    pts, pts_1h, opp_1h = col('pts'), col('pts_1h'), col('opp_pts_1h')
+    # compute_stats ignores zero quarters / first halves (missing line scores)
+    pos_1h = pts_1h > 0
+    big, small = np.iinfo(np.int64).max, np.iinfo(np.int64).min
+    every = np.ones(len(pts), dtype=bool)
+    games = group_count(every)
+    pos_1h_count = group_count(pos_1h)
+    cols = {
+        'games_count': games,
+        'pts_avg': group_sum(pts) / games,
+        'pts_max': group_extreme(pts, every, np.maximum, small),
+        'pts_min': group_extreme(pts, every, np.minimum, big),
+        'pts_1h_avg': group_sum(np.where(pos_1h, pts_1h, 0)) / np.maximum(pos_1h_count, 1),
+        'pts_1h_max': np.where(pos_1h_count > 0, group_extreme(pts_1h, pos_1h, np.maximum, small), 0),
+        'pts_1h_min': np.where(pos_1h_count > 0, group_extreme(pts_1h, pos_1h, np.minimum, big), 0),
+        'wins': group_count(logs['wl'].to_numpy() == 'W'),
+        'wins_1h': group_count((pts_1h > opp_1h) & pos_1h),
+    }
+    q_counts = {}
+    for q in [*Q_COLS, *OPP_Q_COLS]:
+        x = col(q)
+        q_counts[q] = group_count(x > 0)
+        cols[q] = group_sum(np.where(x > 0, x, 0)) / np.maximum(q_counts[q], 1)
+
+    # Python's round on the same float division, so ties round exactly like compute_stats
+    def avg(v, count): return round(float(v), 1) if count else 0
+
+    stats = {}
+    for i, tid in enumerate(team_ids.tolist()):
+        stats[int(tid)] = {
+            'games_count': int(games[i]),
+            'pts_avg': avg(cols['pts_avg'][i], games[i]),
+            'pts_max': int(cols['pts_max'][i]), 'pts_min': int(cols['pts_min'][i]),
+            'pts_1h_avg': avg(cols['pts_1h_avg'][i], pos_1h_count[i]),
+            'pts_1h_max': int(cols['pts_1h_max'][i]), 'pts_1h_min': int(cols['pts_1h_min'][i]),
+            'wins': int(cols['wins'][i]), 'wins_1h': int(cols['wins_1h'][i]),
+            **{q: avg(cols[q][i], q_counts[q][i]) for q in [*Q_COLS, *OPP_Q_COLS]},
+        }
+    return stats
+
+
+# --- Last-N Window Index ---
+WINDOW_SCOPES = ('all', 'home', 'away')
+SUM_KEYS = ('pts', 'pts_1h', 'wins', 'wins_1h', *Q_COLS, *OPP_Q_COLS)
+
+
+def _prefix(x):
+    return np.concatenate([[0], np.cumsum(x)]).astype(np.int64).tolist()
+
+
+def _running(x, mask, ufunc):
+    """Running max/min over the rows where mask holds; 0 until the first such row."""
+    sentinel = np.iinfo(np.int64).min if ufunc is np.maximum else np.iinfo(np.int64).max
+    out = ufunc.accumulate(np.where(mask, x, sentinel)) if len(x) else x
+    return np.where(out == sentinel, 0, out).astype(np.int64).tolist()
+
+
+def window_index(logs):
+    """Prefix aggregates over a newest-first season log, per scope. Any last-n window's card stats
+    then cost O(1) per metric (see data_service.window_stats): sums and counts are differences of
+    prefix arrays, and since windows always start at the newest game, running max/min are exact.
+    Zero first halves / quarters are skipped as in compute_stats."""
+    home = np.array([bool(g['is_home']) for g in logs], dtype=bool)
+    def col(key): return np.array([g[key] for g in logs], dtype=np.int64)
+    pts, pts_1h, opp_1h = col('pts'), col('pts_1h'), col('opp_pts_1h')
+    wins = np.array([g['wl'] == 'W' for g in logs], dtype=np.int64)
+    quarters = {q: col(q) for q in (*Q_COLS, *OPP_Q_COLS)}
+    index = {}
+    for scope in WINDOW_SCOPES:
+        rows = np.flatnonzero(home if scope == 'home' else ~home if scope == 'away' else np.ones(len(logs), bool))
+        p, h1, o1 = pts[rows], pts_1h[rows], opp_1h[rows]
+        pos_1h = h1 > 0
+        sums = {'pts': p, 'pts_1h': np.where(pos_1h, h1, 0), 'wins': wins[rows], 'wins_1h': (h1 > o1) & pos_1h}
+        counts = {'pts_1h': pos_1h}
+        for q, x in quarters.items():
+            x = x[rows]
+            sums[q], counts[q] = np.where(x > 0, x, 0), x > 0
+        index[scope] = {
+            'n': len(rows), 'rows': rows.tolist(),
+            'sum': {k: _prefix(v) for k, v in sums.items()},
+            'count': {k: _prefix(v) for k, v in counts.items()},
+            'max': {'pts': _running(p, p == p, np.maximum), 'pts_1h': _running(h1, pos_1h, np.maximum)},
+            'min': {'pts': _running(p, p == p, np.minimum), 'pts_1h': _running(h1, pos_1h, np.minimum)},
+        }
+    return index
+
+
+# --- Leaders ---
+LEADER_STATS = {'pts': 'PTS', 'reb': 'REB', 'ast': 'AST', 'stl': 'STL', 'blk': 'BLK', 'fg3m': 'FG3M'}
+
+
+def leader_index(players, k=2, stats=LEADER_STATS):
+    """League per-game player rows -> {team_id: {stat: [{'name', 'val'}] top k}}.
+    One partial selection (nlargest) per stat over the whole league, grouped by team."""
+    out = {int(tid): {key: [] for key in stats} for tid in players['TEAM_ID'].unique()}
+    names = players['PLAYER_NAME']
+    for key, col in stats.items():
+        if col not in players: continue
+        top = players.groupby('TEAM_ID', sort=False)[col].nlargest(k)
+        for (tid, idx), val in zip(top.index.tolist(), top.tolist()):
+            out[int(tid)][key].append({'name': names[idx], 'val': round(float(val), 1)})
+    return out